@@ -2,13 +2,15 @@
 Capture endpoints - Screenshot and text processing
 """
 import json
-from typing import Optional
+import asyncio
+from typing import List, Optional
 from fastapi import APIRouter, File, UploadFile, Header, Form
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
-from app.services.ai.analyzer import analyze_text, process_capture
-from app.services.capture import process_capture_result
+from app.services.ai.analyzer import analyze_text, analyze_text_stream, process_capture
+from app.services.capture import process_capture_result, prefetch_destination_context
+from app.services.batch_capture import queue_text_captures, get_queued_batch
 
 router = APIRouter()
 
@@ -19,6 +21,16 @@ class TextInput(BaseModel):
     notion_api_key: Optional[str] = None
     notion_selected_page_id: Optional[str] = None
     google_tokens: Optional[str] = None  # JSON string
+    interactive: bool = True  # False = queue via the OpenAI Batch API (cheaper, up to 24h)
+    background_enrichment: bool = False  # True = create the page now, research properties via the Batch API later
+
+
+class BatchTextInput(BaseModel):
+    """Several non-interactive text captures with optional credentials"""
+    texts: List[str]
+    notion_api_key: Optional[str] = None
+    notion_selected_page_id: Optional[str] = None
+    google_tokens: Optional[str] = None  # JSON string
 
 
 def _parse_google_tokens(tokens_str: Optional[str]) -> Optional[dict]:
@@ -76,11 +88,18 @@ async def process_text_endpoint(
         notion_page_id = input_data.notion_selected_page_id or x_notion_page_id
         google_tokens = _parse_google_tokens(input_data.google_tokens) or _parse_google_tokens(x_google_tokens)
         
+        if not input_data.interactive:
+            batch_id = await queue_text_captures([text], notion_api_key, google_tokens, notion_page_id)
+            return {"status": "queued", "batch_id": batch_id}
+        
         print(f"📝 Processing text input ({len(text)} chars)...", flush=True)
         
-        # Step 1: AI Analysis
+        # Step 1: AI Analysis (destination prechecks run alongside it)
         print("🤖 Step 1: AI Analysis...", flush=True)
-        analysis = analyze_text(text)
+        analysis, prefetched = await asyncio.gather(
+            analyze_text(text),
+            prefetch_destination_context(notion_api_key, google_tokens, notion_page_id)
+        )
         
         if not analysis.get("success", False):
             return JSONResponse(
@@ -93,12 +112,14 @@ async def process_text_endpoint(
             )
         
         # Step 2: Process and route
-        result = process_capture_result(
+        result = await process_capture_result(
             analysis,
             "text",
             notion_api_key=notion_api_key,
             google_tokens=google_tokens,
-            selected_page_id=notion_page_id
+            selected_page_id=notion_page_id,
+            background_enrichment=input_data.background_enrichment,
+            **prefetched
         )
         result["input_type"] = "text"
         result["input_length"] = len(text)
@@ -114,6 +135,77 @@ async def process_text_endpoint(
         )
 
 
+@router.post("/process-text/batch")
+async def process_text_batch_endpoint(
+    input_data: BatchTextInput,
+    x_notion_api_key: Optional[str] = Header(None, alias="X-Notion-Api-Key"),
+    x_notion_page_id: Optional[str] = Header(None, alias="X-Notion-Page-Id"),
+    x_google_tokens: Optional[str] = Header(None, alias="X-Google-Tokens")
+):
+    """
+    Queue text captures for non-interactive processing (e.g. bulk imports).
+    
+    Analysis runs through the OpenAI Batch API; results are routed to
+    Calendar/Notion once the batch completes. Poll GET /process-text/batch/{batch_id}.
+    """
+    texts = [text.strip() for text in input_data.texts if text.strip()]
+    if not texts:
+        return JSONResponse(
+            status_code=400,
+            content={"status": "error", "message": "No text inputs provided"}
+        )
+    
+    raw_notion_key = input_data.notion_api_key or x_notion_api_key
+    notion_api_key = _extract_notion_token(raw_notion_key)
+    notion_page_id = input_data.notion_selected_page_id or x_notion_page_id
+    google_tokens = _parse_google_tokens(input_data.google_tokens) or _parse_google_tokens(x_google_tokens)
+    
+    try:
+        batch_id = await queue_text_captures(texts, notion_api_key, google_tokens, notion_page_id)
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={"status": "error", "message": str(e)}
+        )
+    
+    print(f"📦 Queued {len(texts)} text captures in batch {batch_id}", flush=True)
+    return {"status": "queued", "batch_id": batch_id, "count": len(texts)}
+
+
+@router.get("/process-text/batch/{batch_id}")
+async def get_text_batch_endpoint(batch_id: str):
+    """Status of a queued capture batch, with routing results once it has completed"""
+    batch = get_queued_batch(batch_id)
+    if batch is None:
+        return JSONResponse(
+            status_code=404,
+            content={"status": "error", "message": "Unknown batch"}
+        )
+    return batch
+
+
+@router.post("/analyze-text/stream")
+async def analyze_text_stream_endpoint(input_data: TextInput):
+    """
+    Stream AI analysis of text input as Server-Sent Events.
+    
+    Emits partial results (with "partial": true) as fields arrive, then the
+    final analysis. Analysis only - nothing is routed to Calendar or Notion.
+    """
+    text = input_data.text.strip()
+    if not text:
+        return JSONResponse(
+            status_code=400,
+            content={"status": "error", "message": "Text input is empty"}
+        )
+    
+    async def event_stream():
+        async for update in analyze_text_stream(text):
+            yield f"data: {json.dumps(update, default=str)}\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @router.post("/upload-screenshot")
 async def upload_screenshot_endpoint(
     screenshot: UploadFile = File(...),
@@ -132,7 +224,7 @@ async def upload_screenshot_endpoint(
     - Headers (X-Notion-Api-Key, X-Google-Tokens)
     
     Flow:
-    1. AI Layer: OCR + GPT-4o analysis → determines event vs other
+    1. AI Layer: OCR + GPT-4o analysis (concurrently) → determines event vs other
     2. Route: Events → Google Calendar, Other → Notion
     """
     try:
@@ -148,9 +240,12 @@ async def upload_screenshot_endpoint(
         
         print(f"📷 Processing screenshot ({image_size} bytes)...", flush=True)
         
-        # Step 1: AI Analysis
+        # Step 1: AI Analysis (destination prechecks run alongside it)
         print("🤖 Step 1: AI Analysis...", flush=True)
-        analysis, ocr_text = process_capture(image_data)
+        (analysis, ocr_text), prefetched = await asyncio.gather(
+            process_capture(image_data),
+            prefetch_destination_context(notion_key, g_tokens, notion_page)
+        )
         
         if not analysis.get("success", False):
             return JSONResponse(
@@ -163,12 +258,13 @@ async def upload_screenshot_endpoint(
             )
         
         # Step 2: Process and route
-        result = process_capture_result(
+        result = await process_capture_result(
             analysis,
             "screenshot",
             notion_api_key=notion_key,
             google_tokens=g_tokens,
-            selected_page_id=notion_page
+            selected_page_id=notion_page,
+            **prefetched
         )
         result["input_type"] = "screenshot"
         result["filename"] = screenshot.filename
@@ -199,7 +199,7 @@ def google_auth_logout():
 
 
 @router.delete("/delete-event/{event_id}")
-def delete_event_endpoint(
+async def delete_event_endpoint(
     event_id: str,
     x_google_tokens: Optional[str] = Header(None, alias="X-Google-Tokens")
 ):
@@ -208,7 +208,7 @@ def delete_event_endpoint(
     if not tokens:
         return JSONResponse(status_code=400, content={"error": "No Google tokens provided"})
     
-    result = delete_calendar_event(tokens, event_id)
+    result = await delete_calendar_event(tokens, event_id)
     if result.get("success"):
         return result
     else:
@@ -216,7 +216,7 @@ def delete_event_endpoint(
 
 
 @router.post("/test-event")
-def test_event_endpoint(
+async def test_event_endpoint(
     x_google_tokens: Optional[str] = Header(None, alias="X-Google-Tokens")
 ):
     """Create a test calendar event"""
@@ -237,7 +237,7 @@ def test_event_endpoint(
         "end_time": (start + timedelta(hours=1)).isoformat(),
     }
     
-    result = create_calendar_event(tokens, test_entry)
+    result = await create_calendar_event(tokens, test_entry)
     
     if result.get("success"):
         return {
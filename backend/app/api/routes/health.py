@@ -3,6 +3,9 @@ Health and root endpoints
 """
 from fastapi import APIRouter
 
+from app.services.ai.llm_cache import get_llm_cache
+from app.services.ai.semantic_cache import get_semantic_cache
+
 router = APIRouter()
 
 
@@ -31,5 +34,5 @@ def root():
 @router.get("/health")
 def health():
     """Health check endpoint"""
-    return {"ok": True}
+    return {"ok": True, "llm_cache": get_llm_cache().stats, "semantic_cache": get_semantic_cache().stats}
 
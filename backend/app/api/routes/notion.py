@@ -3,11 +3,14 @@ Notion endpoints - Auth status and data operations
 Supports both Internal Integration (API key) and Public Integration (OAuth)
 """
 import json
+import asyncio
+import hashlib
 import urllib.parse
-from typing import Optional
+from typing import Any, Dict, Optional
 from fastapi import APIRouter, Header, Request
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import JSONResponse, HTMLResponse, Response
 from pydantic import BaseModel
+import orjson
 
 from app.services.notion.client import get_auth_status
 from app.services.notion.pages import fetch_pages
@@ -68,6 +71,20 @@ def notion_auth_status_post(credentials: Optional[NotionCredentials] = None):
     return status
 
 
+def _etag_response(request: Request, payload: Dict[str, Any]) -> Response:
+    """
+    Serialize payload with a weak ETag.
+    Returns 304 Not Modified (no body) when the client's If-None-Match is still current.
+    """
+    body = orjson.dumps(payload, default=str)
+    etag = f'W/"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
 # ============== OAuth Endpoints ==============
 
 @router.get("/auth/url")
@@ -224,7 +241,8 @@ def notion_auth_logout():
 
 
 @router.get("/pages")
-def get_notion_pages(
+async def get_notion_pages(
+    request: Request,
     x_notion_api_key: Optional[str] = Header(None, alias="X-Notion-Api-Key")
 ):
     """Get all accessible Notion pages"""
@@ -232,16 +250,20 @@ def get_notion_pages(
     if not token:
         return JSONResponse(status_code=400, content={"error": "No Notion token provided"})
     
-    status = get_auth_status(token)
+    # Auth check and fetch are independent - overlap their round trips
+    status, pages = await asyncio.gather(
+        asyncio.to_thread(get_auth_status, token),
+        asyncio.to_thread(fetch_pages, token)
+    )
     if not status.get("connected"):
         return JSONResponse(status_code=400, content={"error": "Notion not connected"})
     
-    pages = fetch_pages(token)
-    return {"pages": pages, "count": len(pages)}
+    return _etag_response(request, {"pages": pages, "count": len(pages)})
 
 
 @router.get("/databases")
-def get_notion_databases(
+async def get_notion_databases(
+    request: Request,
     page_id: Optional[str] = None,
     x_notion_api_key: Optional[str] = Header(None, alias="X-Notion-Api-Key"),
     x_notion_page_id: Optional[str] = Header(None, alias="X-Notion-Page-Id")
@@ -251,18 +273,21 @@ def get_notion_databases(
     if not token:
         return JSONResponse(status_code=400, content={"error": "No Notion token provided"})
     
-    status = get_auth_status(token)
+    filter_page_id = page_id or x_notion_page_id
+    status, databases = await asyncio.gather(
+        asyncio.to_thread(get_auth_status, token),
+        asyncio.to_thread(fetch_databases, token, filter_page_id)
+    )
     if not status.get("connected"):
         return JSONResponse(status_code=400, content={"error": "Notion not connected"})
     
-    filter_page_id = page_id or x_notion_page_id
-    databases = fetch_databases(token, filter_page_id)
-    return {"databases": databases, "count": len(databases)}
+    return _etag_response(request, {"databases": databases, "count": len(databases)})
 
 
 @router.get("/databases/{database_id}/properties")
-def get_database_properties_endpoint(
+async def get_database_properties_endpoint(
     database_id: str,
+    request: Request,
     x_notion_api_key: Optional[str] = Header(None, alias="X-Notion-Api-Key")
 ):
     """Get properties schema for a specific database"""
@@ -270,10 +295,15 @@ def get_database_properties_endpoint(
     if not token:
         return JSONResponse(status_code=400, content={"error": "No Notion token provided"})
     
-    status = get_auth_status(token)
+    status, properties = await asyncio.gather(
+        asyncio.to_thread(get_auth_status, token),
+        asyncio.to_thread(fetch_database_properties, token, database_id)
+    )
     if not status.get("connected"):
         return JSONResponse(status_code=400, content={"error": "Notion not connected"})
     
-    properties = fetch_database_properties(token, database_id)
-    return {"database_id": database_id, "properties": properties, "count": len(properties)}
+    return _etag_response(
+        request,
+        {"database_id": database_id, "properties": properties, "count": len(properties)}
+    )
 
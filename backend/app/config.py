@@ -13,6 +13,20 @@ class Settings(BaseSettings):
     # OpenAI
     openai_api_key: str = ""
     openai_model: str = "gpt-4o"
+    openai_max_concurrency: int = 16
+    
+    # LLM response cache - in-memory unless REDIS_URL is set
+    llm_cache_ttl: int = 3600
+    llm_cache_size: int = 512
+    redis_url: Optional[str] = None
+    
+    # Semantic cache for database selection - min cosine similarity to reuse a decision (> 1 disables)
+    semantic_cache_threshold: float = 0.92
+    
+    # OCR - Tesseract page segmentation mode (6 = single uniform block, 11 = sparse text)
+    tesseract_psm: int = 6
+    # Force Tesseract even when RapidOCR is installed
+    ocr_fallback: bool = False
     
     # Google OAuth (server-side config for OAuth flow)
     google_client_id: Optional[str] = None
@@ -24,6 +38,12 @@ class Settings(BaseSettings):
     notion_client_secret: Optional[str] = None
     notion_redirect_uri: str = "http://localhost:8000/notion/auth/callback"
     
+    # Shared HTTP pool - max connections kept open across OpenAI, Notion and Google
+    http_pool: int = 100
+    
+    # Log full AI prompts/responses (AI_DEBUG_LOGGING=0 turns it off)
+    ai_debug_logging: bool = True
+    
     # Server
     debug: bool = False
     cors_origins: str = "*"
@@ -1,13 +1,22 @@
 """Core utilities"""
 from .datetime_utils import get_local_datetime_context
-from .openai_client import get_openai_client
-from .logging import log_ai_prompt, log_ai_response, AI_DEBUG_LOGGING
+from .http_client import get_http_client, close_http_client, get_async_http_client, aclose_http_client
+from .openai_client import get_openai_client, get_async_openai_client, create_chat_completion
+from .logging import configure_logging, log_ai_prompt, log_ai_response, log_ai_usage, AI_DEBUG_LOGGING
 
 __all__ = [
     "get_local_datetime_context",
+    "get_http_client",
+    "close_http_client",
+    "get_async_http_client",
+    "aclose_http_client",
     "get_openai_client", 
+    "get_async_openai_client",
+    "create_chat_completion",
+    "configure_logging",
     "log_ai_prompt",
     "log_ai_response",
+    "log_ai_usage",
     "AI_DEBUG_LOGGING"
 ]
 
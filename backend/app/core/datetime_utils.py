@@ -1,14 +1,31 @@
 """
 Datetime utilities for timezone-aware operations
 """
+import time
+import logging
 from datetime import datetime
-from typing import Dict
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (monotonic second, context) - the context only grounds prompts, so per-second freshness is plenty
+_dt_cache: Tuple[int, Dict[str, str]] = (-1, {})
 
 
 def get_local_datetime_context() -> Dict[str, str]:
-    """Get current datetime in local timezone with full context."""
+    """
+    Get current datetime in local timezone with full context.
+    Cached for the current second - treat the returned dict as read-only.
+    """
+    global _dt_cache
+    
+    now_s = int(time.monotonic())
+    cached_s, cached = _dt_cache
+    if cached_s == now_s:
+        return cached
+    
     local_now = datetime.now().astimezone()
-    return {
+    context = {
         "datetime_iso": local_now.isoformat(),
         "date": local_now.strftime("%Y-%m-%d"),
         "time": local_now.strftime("%H:%M:%S"),
@@ -17,6 +34,8 @@ def get_local_datetime_context() -> Dict[str, str]:
         "weekday": local_now.strftime("%A"),
         "formatted": local_now.strftime("%A, %B %d, %Y at %I:%M %p %Z")
     }
+    _dt_cache = (now_s, context)
+    return context
 
 
 def parse_datetime_string(dt_str: str, local_tz=None) -> datetime | None:
@@ -37,6 +56,6 @@ def parse_datetime_string(dt_str: str, local_tz=None) -> datetime | None:
         
         return dt
     except Exception as e:
-        print(f"⚠️ Date parse error: {e}")
+        logger.warning("⚠️ Date parse error: %s", e)
         return None
 
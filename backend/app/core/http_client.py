@@ -0,0 +1,66 @@
+"""
+Shared HTTP Client - One connection pool for all outbound API calls
+"""
+import threading
+from typing import Optional
+import httpx
+
+from app.config import settings
+
+# Keep-alive pool shared by OpenAI, Notion and Google Calendar calls so TCP+TLS
+# handshakes are paid once per host instead of once per request.
+# settings.http_pool (HTTP_POOL) sizes it; idle connections are kept for 60s between captures.
+HTTP_POOL_SIZE = settings.http_pool
+HTTP_LIMITS = httpx.Limits(
+    max_keepalive_connections=HTTP_POOL_SIZE,
+    max_connections=HTTP_POOL_SIZE,
+    keepalive_expiry=60.0
+)
+# Fail fast on connect; 30s covers the gaps between streamed completion chunks
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+
+_client: Optional[httpx.Client] = None
+_async_client: Optional[httpx.AsyncClient] = None
+# The sync client is first requested from worker threads (asyncio.to_thread)
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """Get or create the shared HTTP client (lazy initialization)"""
+    global _client
+
+    if _client is None or _client.is_closed:
+        with _client_lock:
+            # Re-check: another thread may have created it while we waited
+            if _client is None or _client.is_closed:
+                _client = httpx.Client(http2=True, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+
+    return _client
+
+
+def close_http_client():
+    """Close the shared HTTP client (called on app shutdown)"""
+    global _client
+
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Get or create the shared async HTTP client (lazy initialization)"""
+    global _async_client
+    
+    if _async_client is None or _async_client.is_closed:
+        _async_client = httpx.AsyncClient(http2=True, limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+    
+    return _async_client
+
+
+async def aclose_http_client():
+    """Close the shared async HTTP client (called on app shutdown)"""
+    global _async_client
+    
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
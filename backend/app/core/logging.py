@@ -1,27 +1,95 @@
 """
-Logging utilities for AI operations
+Logging utilities - app-wide logging setup and AI prompt/response logging
 """
+import os
+import sys
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
 
-# Enable detailed AI logging
-AI_DEBUG_LOGGING = True
+from app.config import settings
 
+# Enable detailed AI logging (AI_DEBUG_LOGGING=0 turns it off)
+AI_DEBUG_LOGGING = settings.ai_debug_logging
 
-def log_ai_prompt(method_name: str, prompt: str):
-    """Log AI prompt to terminal"""
-    if AI_DEBUG_LOGGING:
-        print(f"\n{'='*60}")
-        print(f"🤖 AI PROMPT [{method_name}]")
-        print(f"{'='*60}")
-        print(prompt[:2000] + "..." if len(prompt) > 2000 else prompt)
-        print(f"{'='*60}\n")
+# Longest prompt/response excerpt written to the log
+AI_LOG_LIMIT = 2000
+
+# Level for the app's module loggers (LOG_LEVEL=DEBUG for verbose output)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Loggers only enqueue records; a background thread writes them to stdout,
+# so request handlers never block on the terminal
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_stdout_handler = logging.StreamHandler(sys.stdout)
+_stdout_handler.setFormatter(logging.Formatter("%(message)s"))
+_listener = QueueListener(_log_queue, _stdout_handler)
+_listener_running = False
+
+
+def _queue_handler() -> QueueHandler:
+    """Handler feeding the stdout writer thread (started on first use)"""
+    global _listener_running
+    if not _listener_running:
+        _listener.start()
+        _listener_running = True
+        atexit.register(stop_logging)
+    return QueueHandler(_log_queue)
+
+
+def stop_logging():
+    """Write out queued records and stop the writer thread"""
+    global _listener_running
+    if _listener_running:
+        _listener.stop()
+        _listener_running = False
+
+
+ai_logger = logging.getLogger("app.ai")
+if AI_DEBUG_LOGGING:
+    ai_logger.addHandler(_queue_handler())
+    ai_logger.setLevel(logging.DEBUG)
+    ai_logger.propagate = False
+
+
+def configure_logging():
+    """Send app.* module logs to stdout (called once at startup)"""
+    app_logger = logging.getLogger("app")
+    if app_logger.handlers:
+        return
+    app_logger.addHandler(_queue_handler())
+    app_logger.setLevel(LOG_LEVEL)
+    app_logger.propagate = False
+
+
+def _truncate(text: str) -> str:
+    return text if len(text) <= AI_LOG_LIMIT else text[:AI_LOG_LIMIT] + "..."
+
+
+def log_ai_prompt(method_name: str, prompt: str, suffix: str = ""):
+    """
+    Log AI prompt to terminal.
+    suffix is appended only when logging is on, so callers don't build the string otherwise.
+    """
+    if not ai_logger.isEnabledFor(logging.DEBUG):
+        return
+    rule = "=" * 60
+    ai_logger.debug("\n%s\n🤖 AI PROMPT [%s]\n%s\n%s%s\n%s\n", rule, method_name, rule, _truncate(prompt), suffix, rule)
 
 
 def log_ai_response(method_name: str, response: str):
     """Log AI response to terminal"""
-    if AI_DEBUG_LOGGING:
-        print(f"\n{'-'*60}")
-        print(f"📨 AI RESPONSE [{method_name}]")
-        print(f"{'-'*60}")
-        print(response[:2000] + "..." if len(response) > 2000 else response)
-        print(f"{'-'*60}\n")
+    if not ai_logger.isEnabledFor(logging.DEBUG):
+        return
+    rule = "-" * 60
+    ai_logger.debug("\n%s\n📨 AI RESPONSE [%s]\n%s\n%s\n%s\n", rule, method_name, rule, _truncate(response), rule)
+
 
+def log_ai_usage(method_name: str, usage):
+    """Log token usage, including how much of the prompt was served from OpenAI's prompt cache"""
+    if usage is None or not ai_logger.isEnabledFor(logging.DEBUG):
+        return
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", 0) or 0
+    ai_logger.debug("📊 AI USAGE [%s] prompt=%s cached=%s completion=%s", method_name, usage.prompt_tokens, cached, usage.completion_tokens)
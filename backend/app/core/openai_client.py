@@ -1,11 +1,32 @@
 """
-OpenAI Client - Lazy initialization
+OpenAI Client - Lazy initialization, shared concurrency limit and rate-limit backoff
 """
-from typing import Optional
-from openai import OpenAI
-from app.config import get_openai_api_key
+import asyncio
+import random
+import logging
+import threading
+from typing import Any, Optional
+from openai import OpenAI, AsyncOpenAI, RateLimitError, APITimeoutError, APIConnectionError, InternalServerError
+from app.config import settings, get_openai_api_key
+from app.core.http_client import get_http_client, get_async_http_client
+
+logger = logging.getLogger(__name__)
+
+# Retries on 429s, timeouts, dropped connections and 5xx, backing off 1s, 2s, 4s... (capped) plus jitter
+OPENAI_MAX_RETRIES = 5
+OPENAI_BACKOFF_MAX = 30
+OPENAI_RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+# SDK-level retries for calls that don't go through create_chat_completion
+# (embeddings, files, batches) - use client.with_options(max_retries=OPENAI_SDK_RETRIES)
+OPENAI_SDK_RETRIES = 2
 
 _client: Optional[OpenAI] = None
+_async_client: Optional[AsyncOpenAI] = None
+_client_lock = threading.Lock()
+
+# Caps in-flight completions across all captures (OPENAI_MAX_CONCURRENCY)
+_openai_sem = asyncio.Semaphore(settings.openai_max_concurrency)
 
 
 def get_openai_client() -> Optional[OpenAI]:
@@ -13,9 +34,84 @@ def get_openai_client() -> Optional[OpenAI]:
     global _client
     
     if _client is None:
+        with _client_lock:
+            if _client is None:
+                api_key = get_openai_api_key()
+                if api_key:
+                    _client = OpenAI(api_key=api_key, http_client=get_http_client())
+    
+    return _client
+
+
+def get_async_openai_client() -> Optional[AsyncOpenAI]:
+    """Get or create async OpenAI client (lazy initialization)"""
+    global _async_client
+    
+    if _async_client is None:
         api_key = get_openai_api_key()
         if api_key:
-            _client = OpenAI(api_key=api_key)
+            # Retries are handled by create_chat_completion, outside the semaphore
+            _async_client = AsyncOpenAI(api_key=api_key, http_client=get_async_http_client(), max_retries=0)
     
-    return _client
+    return _async_client
 
+
+class _ThrottledStream:
+    """Streamed completion that holds its concurrency slot until it is drained or closed"""
+    
+    def __init__(self, stream: Any):
+        self._stream = stream
+        self._released = False
+    
+    def _release(self):
+        if not self._released:
+            self._released = True
+            _openai_sem.release()
+    
+    def __aiter__(self):
+        return self._iterate()
+    
+    async def _iterate(self):
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        finally:
+            self._release()
+    
+    async def close(self):
+        try:
+            await self._stream.close()
+        finally:
+            self._release()
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+
+async def create_chat_completion(client: AsyncOpenAI, **params) -> Any:
+    """
+    client.chat.completions.create, limited to OPENAI_MAX_CONCURRENCY concurrent
+    requests and retried with exponential backoff on rate limits, timeouts,
+    connection errors and server errors.
+    
+    With stream=True the slot is held until the returned stream is drained or
+    closed - callers must close it (e.g. in a finally block).
+    """
+    for attempt in range(OPENAI_MAX_RETRIES + 1):
+        try:
+            await _openai_sem.acquire()
+            try:
+                response = await client.chat.completions.create(**params)
+            except BaseException:
+                _openai_sem.release()
+                raise
+            if params.get("stream"):
+                return _ThrottledStream(response)
+            _openai_sem.release()
+            return response
+        except OPENAI_RETRYABLE_ERRORS as e:
+            if attempt == OPENAI_MAX_RETRIES:
+                raise
+            delay = min(OPENAI_BACKOFF_MAX, 2 ** attempt) + random.uniform(0, 1)
+            logger.warning("⏳ OpenAI %s, retrying in %.1fs", type(e).__name__, delay)
+            await asyncio.sleep(delay)
@@ -58,6 +58,12 @@ print("✅ Environment variables loaded", flush=True)
 
 # Import router
 from app.api.router import api_router
+from app.core.logging import configure_logging
+from app.core.http_client import close_http_client, aclose_http_client
+from app.services.ai.ocr import close_ocr_pool
+from app.services.log_queue import flush_log_entries
+
+configure_logging()
 
 # Create app
 print("🔧 Creating FastAPI app...", flush=True)
@@ -101,3 +107,11 @@ async def startup_event():
     print("   Frontend stores: Notion API Key, Google OAuth Tokens", flush=True)
     print("")
 
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await flush_log_entries()
+    close_http_client()
+    await aclose_http_client()
+    close_ocr_pool()
+    print("👋 FastAPI server stopped", flush=True)
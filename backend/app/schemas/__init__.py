@@ -1,5 +1,5 @@
 """Pydantic schemas for API models"""
-from .capture import TextInput, CaptureResult, CaptureResultSummary
+from .capture import TextInput, TextAnalysis, PropertyAnalysis, DatabaseSelection, CaptureResult, CaptureResultSummary
 from .google import GoogleAuthStatus, GoogleCredentials, GoogleAuthURL
 from .notion import NotionAuthStatus, NotionPage, NotionDatabase, NotionDatabaseProperty
 from .credentials import RequestCredentials
@@ -7,6 +7,9 @@ from .credentials import RequestCredentials
 __all__ = [
     # Capture
     "TextInput",
+    "TextAnalysis",
+    "PropertyAnalysis",
+    "DatabaseSelection",
     "CaptureResult", 
     "CaptureResultSummary",
     # Google
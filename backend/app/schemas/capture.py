@@ -1,8 +1,8 @@
 """
 Capture-related schemas
 """
-from typing import Optional, List, Dict, Any
-from pydantic import BaseModel
+from typing import Optional, List, Dict, Any, Literal, Union
+from pydantic import BaseModel, ConfigDict
 from .credentials import RequestCredentials
 
 
@@ -12,6 +12,89 @@ class TextInput(BaseModel):
     credentials: Optional[RequestCredentials] = None
 
 
+class ExtractedField(BaseModel):
+    """Free-form key/value pair pulled from the input"""
+    model_config = ConfigDict(extra="forbid")
+    
+    key: str
+    value: str
+
+
+class TextAnalysis(BaseModel):
+    """
+    Structured output of the AI text analysis.
+    No defaults and no extra keys, so the JSON schema is valid for OpenAI strict mode.
+    """
+    model_config = ConfigDict(extra="forbid")
+    
+    category: Literal["event", "other"]
+    confidence: float
+    title: str
+    description: str
+    detailed_analysis: str
+    content: Optional[str]
+    content_type: Literal["event", "movie", "book", "task", "note", "recipe", "article", "music", "contact", "other"]
+    start_time: Optional[str]
+    end_time: Optional[str]
+    location: Optional[str]
+    do_date: Optional[str]
+    deadline: Optional[str]
+    extracted_fields: List[ExtractedField]
+
+
+class PropertyMapping(BaseModel):
+    """A database property filled from the user's data"""
+    model_config = ConfigDict(extra="forbid")
+    
+    property: str
+    value: Union[str, float, bool, List[str]]
+    source: str
+    reasoning: str
+
+
+class UnmappedProperty(BaseModel):
+    """A database property the user's data doesn't fill"""
+    model_config = ConfigDict(extra="forbid")
+    
+    property: str
+    researchable: bool
+    reasoning: str
+
+
+class PropertyAnalysis(BaseModel):
+    """Structured output of the AI property analysis (mapping + researchable detection in one call)"""
+    model_config = ConfigDict(extra="forbid")
+    
+    mappings: List[PropertyMapping]
+    unmapped: List[UnmappedProperty]
+    overall_reasoning: str
+
+
+class PropertyAnalysisItem(BaseModel):
+    """One capture's property analysis inside a combined call"""
+    model_config = ConfigDict(extra="forbid")
+    
+    id: str
+    analysis: PropertyAnalysis
+
+
+class PropertyAnalysisBatch(BaseModel):
+    """Structured output of a property analysis covering several captures"""
+    model_config = ConfigDict(extra="forbid")
+    
+    results: List[PropertyAnalysisItem]
+
+
+class DatabaseSelection(BaseModel):
+    """Structured output of the AI database selection"""
+    model_config = ConfigDict(extra="forbid")
+    
+    found_match: bool
+    selected_index: Optional[int]
+    confidence: float
+    reason: str
+
+
 class FilledProperty(BaseModel):
     """A property that was filled"""
     property: str
@@ -1,19 +1,22 @@
 """
 AI Services - Facade for all AI operations
 """
-from .analyzer import analyze_text, analyze_screenshot, extract_text_ocr
+from .analyzer import analyze_text, analyze_text_stream, analyze_screenshot
+from .ocr import extract_text_ocr, extract_text_ocr_async
 from .database_selector import select_best_database
-from .property_mapper import map_properties_dynamically
-from .enricher import identify_researchable_properties, enrich_properties
+from .property_mapper import analyze_properties
+from .enricher import enrich_properties, enrich_properties_stream
 
 __all__ = [
     "analyze_text",
+    "analyze_text_stream",
     "analyze_screenshot", 
     "extract_text_ocr",
+    "extract_text_ocr_async",
     "select_best_database",
-    "map_properties_dynamically",
-    "identify_researchable_properties",
+    "analyze_properties",
     "enrich_properties",
+    "enrich_properties_stream",
 ]
 
 
@@ -1,36 +1,57 @@
 """
 AI Analyzer - OCR and content analysis
 """
+import logging
 import io
-import base64
+import binascii
 import json
-from typing import Dict, Any, Tuple
-from PIL import Image
-import pytesseract
+import asyncio
+from typing import Dict, Any, AsyncIterator, Final, List, Optional, Tuple
+from pydantic import ValidationError
 
-from app.core import get_openai_client, get_local_datetime_context, log_ai_prompt, log_ai_response
-from app.services.ai.prompts.loader import render_prompt
+from app.core import get_async_openai_client, create_chat_completion, get_local_datetime_context, log_ai_prompt, log_ai_response
+from app.services.ai.ocr import extract_text_ocr_async, open_screenshot
+from app.schemas.capture import TextAnalysis
+from app.services.ai.prompts.loader import load_prompt, load_examples, render_prompt
+from app.services.ai.response_parser import IncrementalJSONParser, aiter_stream_text, aread_json_stream, extract_json
 
+logger = logging.getLogger(__name__)
 
-def extract_text_ocr(image_data: bytes) -> str:
-    """Extract text from image using OCR"""
-    try:
-        image = Image.open(io.BytesIO(image_data))
-        text = pytesseract.image_to_string(image)
-        return text.strip()
-    except Exception as e:
-        print(f"OCR Error: {e}")
-        return ""
+# Shown to the vision model in place of OCR text when OCR runs concurrently with it
+OCR_PENDING_TEXT = "(OCR runs in parallel - read any text directly from the image)"
+OCR_EMPTY_TEXT = "(No text detected)"
+
+# Vision upload is re-encoded as a downscaled JPEG - a fraction of the bytes of a full-size PNG
+VISION_MAX_SIZE = 2000
+VISION_JPEG_QUALITY = 70
+
+# Structured output for text analysis - the model can only return schema-valid JSON
+TEXT_ANALYSIS_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "text_analysis", "strict": True, "schema": TextAnalysis.model_json_schema()},
+}
+
+# Loaded once; the same message object heads every text analysis request
+_TEXT_INSTRUCTIONS: Final[Dict[str, str]] = {"role": "system", "content": load_prompt("analyze_text_system")}
+
+
+def _encode_for_vision(image_data: bytes) -> str:
+    """Downscale and JPEG-encode a screenshot, returning a base64 data URL"""
+    image = open_screenshot(image_data, "RGB", VISION_MAX_SIZE)
+    
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=VISION_JPEG_QUALITY, optimize=True)
+    # Encode straight from the buffer's memory - no intermediate bytes copy
+    image_base64 = binascii.b2a_base64(buffer.getbuffer(), newline=False).decode("ascii")
+    return "data:image/jpeg;base64," + image_base64
 
 
 def _parse_ai_response(response: str) -> Dict[str, Any]:
     """Parse and validate AI response JSON"""
     try:
-        json_start = response.find('{')
-        json_end = response.rfind('}') + 1
+        data = extract_json(response)
         
-        if json_start >= 0 and json_end > json_start:
-            data = json.loads(response[json_start:json_end])
+        if data is not None:
             
             category = data.get("category", "other")
             if category not in ["event", "other"]:
@@ -47,7 +68,7 @@ def _parse_ai_response(response: str) -> Dict[str, Any]:
             raise ValueError("No JSON found")
             
     except (json.JSONDecodeError, ValueError) as e:
-        print(f"Parse error: {e}")
+        logger.warning("Parse error: %s", e)
         return {
             "category": "other",
             "title": "Parse Error",
@@ -58,52 +79,103 @@ def _parse_ai_response(response: str) -> Dict[str, Any]:
         }
 
 
-def analyze_text(text: str) -> Dict[str, Any]:
-    """Analyze text input with GPT-4o."""
-    client = get_openai_client()
+def _parse_text_analysis(response: str) -> Dict[str, Any]:
+    """Validate a structured text analysis, falling back to lenient parsing"""
+    try:
+        analysis = TextAnalysis.model_validate_json(response)
+    except ValidationError:
+        return _parse_ai_response(response)
+    
+    data = analysis.model_dump()
+    data["extracted_fields"] = {field["key"]: field["value"] for field in data["extracted_fields"]}
+    data["ai_confidence"] = data.pop("confidence")
+    return data
+
+
+def _build_text_messages(text: str, dt_context: Dict[str, Any]) -> List[Dict[str, str]]:
+    """System rules + few-shot examples + the capture itself"""
+    return [
+        _TEXT_INSTRUCTIONS,
+        *load_examples("analyze_text"),
+        {"role": "user", "content": render_prompt("analyze_text", dt_context, text=text)},
+    ]
+
+
+def build_text_analysis_request(text: str, dt_context: Dict[str, Any]) -> Dict[str, Any]:
+    """Chat completion body for a (non-streamed) text analysis, e.g. for the Batch API"""
+    return {
+        "model": "gpt-4o",
+        "messages": _build_text_messages(text, dt_context),
+        "response_format": TEXT_ANALYSIS_FORMAT,
+        "max_tokens": 1500,
+    }
+
+
+def finalize_text_analysis(ai_response_text: str, text: str, dt_context: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn the raw AI response for a text capture into the analysis result"""
+    result = _parse_text_analysis(ai_response_text)
+    result["raw_input"] = text
+    result["source_text"] = text
+    result["capture_datetime"] = dt_context["datetime_iso"]
+    result["capture_date"] = dt_context["date"]
+    result["capture_time"] = dt_context["time"]
+    result["capture_timezone"] = dt_context["timezone"]
+    result["success"] = True
+    return result
+
+
+async def analyze_text_stream(text: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Analyze text input with GPT-4o, streaming the response.
+    
+    Yields {"partial": True, ...} snapshots as top-level fields of the AI
+    response complete, then the final analysis (same shape as analyze_text).
+    """
+    client = get_async_openai_client()
     if not client:
-        return {"success": False, "error": "OpenAI API key not configured", "category": None}
+        yield {"success": False, "error": "OpenAI API key not configured", "category": None}
+        return
     
     dt_context = get_local_datetime_context()
     
-    prompt = render_prompt(
-        "analyze_text",
-        datetime_formatted=dt_context['formatted'],
-        datetime_iso=dt_context['datetime_iso'],
-        timezone=dt_context['timezone'],
-        timezone_offset=dt_context['timezone_offset'],
-        text=text
-    )
+    messages = _build_text_messages(text, dt_context)
 
     try:
-        log_ai_prompt("analyze_text", prompt)
+        log_ai_prompt("analyze_text", messages[-1]["content"])
         
-        response = client.chat.completions.create(
+        stream = await create_chat_completion(
+            client,
             model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=1500
+            messages=messages,
+            response_format=TEXT_ANALYSIS_FORMAT,
+            max_tokens=1500,
+            stream=True
         )
         
-        ai_response_text = response.choices[0].message.content
+        parser = IncrementalJSONParser()
+        try:
+            async for delta in aiter_stream_text(stream):
+                partial = parser.feed(delta)
+                if parser.complete:
+                    break
+                if partial is not None:
+                    yield {"partial": True, **partial}
+        finally:
+            await stream.close()
+        
+        ai_response_text = parser.text
         log_ai_response("analyze_text", ai_response_text)
         
-        result = _parse_ai_response(ai_response_text)
-        result["raw_input"] = text
-        result["source_text"] = text
-        result["capture_datetime"] = dt_context["datetime_iso"]
-        result["capture_date"] = dt_context["date"]
-        result["capture_time"] = dt_context["time"]
-        result["capture_timezone"] = dt_context["timezone"]
-        result["success"] = True
+        result = finalize_text_analysis(ai_response_text, text, dt_context)
         
-        print(f"AI categorized text as: {result.get('category')} (confidence: {result.get('ai_confidence', 0):.2f})")
+        logger.info("AI categorized text as: %s (confidence: %.2f)", result.get('category'), result.get('ai_confidence', 0))
         
-        return result
+        yield result
         
     except Exception as e:
-        print(f"AI Text Analysis Error: {e}")
+        logger.exception("AI Text Analysis Error: %s", e)
         dt = get_local_datetime_context()
-        return {
+        yield {
             "success": True,
             "category": "other",
             "title": "AI Analysis Failed",
@@ -119,41 +191,49 @@ def analyze_text(text: str) -> Dict[str, Any]:
         }
 
 
-def analyze_screenshot(image_data: bytes, ocr_text: str) -> Dict[str, Any]:
-    """Analyze screenshot with GPT-4o Vision."""
-    client = get_openai_client()
+async def analyze_text(text: str) -> Dict[str, Any]:
+    """Analyze text input with GPT-4o."""
+    result = None
+    async for result in analyze_text_stream(text):
+        pass
+    return result
+
+
+async def analyze_screenshot(image_data: bytes, ocr_text: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Analyze screenshot with GPT-4o Vision.
+    ocr_text=None means OCR hasn't finished (it runs concurrently) - the model reads the image itself.
+    """
+    client = get_async_openai_client()
     if not client:
         return {"success": False, "error": "OpenAI API key not configured", "category": None}
     
     dt_context = get_local_datetime_context()
     
-    prompt = render_prompt(
-        "analyze_screenshot",
-        datetime_formatted=dt_context['formatted'],
-        datetime_iso=dt_context['datetime_iso'],
-        timezone=dt_context['timezone'],
-        timezone_offset=dt_context['timezone_offset'],
-        ocr_text=ocr_text if ocr_text else "(No text detected)"
-    )
+    ocr_display = OCR_PENDING_TEXT if ocr_text is None else (ocr_text or OCR_EMPTY_TEXT)
+    prompt = render_prompt("analyze_screenshot", dt_context, ocr_text=ocr_display)
+    ocr_text = ocr_text or ""
 
     try:
-        image_base64 = base64.b64encode(image_data).decode('utf-8')
+        image_url = await asyncio.to_thread(_encode_for_vision, image_data)
         
-        log_ai_prompt("analyze_screenshot", prompt + "\n[+ IMAGE DATA]")
+        log_ai_prompt("analyze_screenshot", prompt, suffix="\n[+ IMAGE DATA]")
         
-        response = client.chat.completions.create(
+        response = await create_chat_completion(
+            client,
             model="gpt-4o",
             messages=[{
                 "role": "user",
                 "content": [
                     {"type": "text", "text": prompt},
-                    {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{image_base64}"}}
+                    {"type": "image_url", "image_url": {"url": image_url}}
                 ]
             }],
-            max_tokens=1500
+            max_tokens=1500,
+            stream=True
         )
         
-        ai_response_text = response.choices[0].message.content
+        ai_response_text = await aread_json_stream(response)
         log_ai_response("analyze_screenshot", ai_response_text)
         
         result = _parse_ai_response(ai_response_text)
@@ -168,7 +248,7 @@ def analyze_screenshot(image_data: bytes, ocr_text: str) -> Dict[str, Any]:
         return result
         
     except Exception as e:
-        print(f"AI Analysis Error: {e}")
+        logger.exception("AI Analysis Error: %s", e)
         dt = get_local_datetime_context()
         return {
             "success": True,
@@ -186,12 +266,22 @@ def analyze_screenshot(image_data: bytes, ocr_text: str) -> Dict[str, Any]:
         }
 
 
-def process_capture(image_data: bytes) -> Tuple[Dict[str, Any], str]:
-    """Full capture processing: OCR + AI analysis"""
-    ocr_text = extract_text_ocr(image_data)
-    print(f"OCR extracted {len(ocr_text)} characters")
+async def process_capture(image_data: bytes) -> Tuple[Dict[str, Any], str]:
+    """
+    Full capture processing: OCR + AI analysis.
+    OCR (CPU-bound, batched in a worker thread) and the vision call (network-bound) run concurrently.
+    """
+    analysis, ocr_text = await asyncio.gather(
+        analyze_screenshot(image_data),
+        extract_text_ocr_async(image_data)
+    )
+    logger.info("OCR extracted %d characters", len(ocr_text))
+    logger.info("AI categorized as: %s (confidence: %.2f)", analysis.get('category'), analysis.get('ai_confidence', 0))
     
-    analysis = analyze_screenshot(image_data, ocr_text)
-    print(f"AI categorized as: {analysis.get('category')} (confidence: {analysis.get('ai_confidence', 0):.2f})")
+    if analysis.get("success"):
+        analysis["raw_input"] = ocr_text
+        analysis["source_text"] = ocr_text
+        if not analysis.get("content"):
+            analysis["content"] = ocr_text
     
     return analysis, ocr_text
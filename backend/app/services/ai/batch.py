@@ -0,0 +1,133 @@
+"""
+AI Batch - OpenAI Batch API for non-interactive captures
+
+Batched chat completions are billed at half price and don't count against
+the real-time rate limits, at the cost of up to a 24h turnaround.
+"""
+import time
+import logging
+import asyncio
+from typing import Callable, Dict, Any, List, Optional, Tuple
+import orjson
+
+from app.core import get_async_openai_client
+from app.core.openai_client import OPENAI_SDK_RETRIES
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+
+# Batch turnaround is minutes to hours - no point polling more often than this
+BATCH_POLL_INTERVAL = 60
+
+# Terminal batch states that will never produce (more) output
+BATCH_FAILED_STATES = ("failed", "expired", "cancelled")
+
+# Give up polling after this many consecutive errors (bad id, revoked key, deleted file)...
+BATCH_MAX_POLL_FAILURES = 10
+# ...or once the batch is well past its 24h completion window
+BATCH_MAX_WAIT = 26 * 3600
+
+
+async def submit_batch(requests: List[Dict[str, Any]]) -> str:
+    """
+    Submit chat completion requests as one batch.
+    
+    Each request is {"custom_id": str, "body": {...chat completion params}}.
+    Returns the batch id.
+    """
+    client = get_async_openai_client()
+    if not client:
+        raise RuntimeError("OpenAI API key not configured")
+    client = client.with_options(max_retries=OPENAI_SDK_RETRIES)
+    
+    lines = [
+        orjson.dumps({
+            "custom_id": request["custom_id"],
+            "method": "POST",
+            "url": BATCH_ENDPOINT,
+            "body": request["body"],
+        })
+        for request in requests
+    ]
+    payload = b"\n".join(lines) + b"\n"
+    
+    input_file = await client.files.create(file=("batch.jsonl", payload), purpose="batch")
+    batch = await client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window=BATCH_COMPLETION_WINDOW
+    )
+    
+    logger.info("📦 Submitted OpenAI batch %s (%d requests)", batch.id, len(requests))
+    return batch.id
+
+
+async def get_batch_results(batch_id: str) -> Tuple[str, Optional[Dict[str, Optional[str]]]]:
+    """
+    Fetch the status and, once completed, the output of a batch.
+    
+    Returns (status, results) where results is {custom_id: response text
+    (None if that request failed)}, or None until the batch has completed.
+    """
+    client = get_async_openai_client()
+    if not client:
+        raise RuntimeError("OpenAI API key not configured")
+    client = client.with_options(max_retries=OPENAI_SDK_RETRIES)
+    
+    batch = await client.batches.retrieve(batch_id)
+    if batch.status != "completed":
+        return batch.status, None
+    
+    results: Dict[str, Optional[str]] = {}
+    if not batch.output_file_id:
+        return batch.status, results
+    
+    output = await client.files.content(batch.output_file_id)
+    for line in output.text.splitlines():
+        if not line.strip():
+            continue
+        record = orjson.loads(line)
+        response = record.get("response") or {}
+        if response.get("status_code") == 200:
+            results[record["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+        else:
+            results[record["custom_id"]] = None
+    
+    return batch.status, results
+
+
+async def wait_for_batch(
+    batch_id: str,
+    on_status: Optional[Callable[[str], None]] = None
+) -> Tuple[str, Optional[Dict[str, Optional[str]]]]:
+    """
+    Poll a batch until it completes or fails.
+    
+    on_status is called with every status seen. Returns (status, results)
+    as get_batch_results does; results is None if the batch failed, or if
+    polling gave up ("poll_failed" / "timed_out").
+    """
+    failures = 0
+    deadline = time.monotonic() + BATCH_MAX_WAIT
+    while True:
+        if time.monotonic() > deadline:
+            logger.error("❌ Batch %s still not finished after %ds, giving up", batch_id, BATCH_MAX_WAIT)
+            return "timed_out", None
+        
+        await asyncio.sleep(BATCH_POLL_INTERVAL)
+        try:
+            status, results = await get_batch_results(batch_id)
+        except Exception as e:
+            failures += 1
+            logger.warning("⚠️ Batch %s poll failed (%d/%d): %s", batch_id, failures, BATCH_MAX_POLL_FAILURES, e)
+            if failures >= BATCH_MAX_POLL_FAILURES:
+                return "poll_failed", None
+            continue
+        failures = 0
+        
+        if on_status is not None:
+            on_status(status)
+        if status in BATCH_FAILED_STATES or results is not None:
+            return status, results
@@ -1,14 +1,34 @@
 """
 AI Database Selector - Selects best Notion database for content
 """
-import json
-from typing import Dict, Any, List
+import logging
+from itertools import islice
+from typing import Dict, Any, Final, List
 
-from app.core import get_openai_client, log_ai_prompt, log_ai_response
-from app.services.ai.prompts.loader import render_prompt
+from app.core import get_async_openai_client, create_chat_completion, log_ai_prompt, log_ai_response, log_ai_usage
+from app.schemas.capture import DatabaseSelection
+from app.services.ai.llm_cache import get_llm_cache, make_cache_key
+from app.services.ai.semantic_cache import embed_text, get_semantic_cache, namespace_key
+from app.services.ai.prompts.loader import load_prompt, render_prompt, prompt_json
+from app.services.ai.response_parser import extract_json
 
+logger = logging.getLogger(__name__)
 
-def select_best_database(
+# Static system message - only the user message is rendered per call
+_SELECT_INSTRUCTIONS: Final[Dict[str, str]] = {"role": "system", "content": load_prompt("select_database_system")}
+
+DATABASE_SELECTION_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "database_selection", "strict": True, "schema": DatabaseSelection.model_json_schema()},
+}
+
+
+def _is_confident_match(selection: DatabaseSelection, database_count: int) -> bool:
+    index = selection.selected_index
+    return selection.found_match and index is not None and 0 <= index < database_count and selection.confidence >= 0.5
+
+
+async def select_best_database(
     user_data: Dict[str, Any],
     databases: List[Dict[str, Any]]
 ) -> Dict[str, Any]:
@@ -16,7 +36,7 @@ def select_best_database(
     Use AI to select the most appropriate database.
     Returns detailed result with success/failure and reasoning.
     """
-    client = get_openai_client()
+    client = get_async_openai_client()
     
     if not databases:
         return {
@@ -40,13 +60,15 @@ def select_best_database(
     content_type = user_data.get("content_type", "")
     detailed_analysis = user_data.get("detailed_analysis", "")
     
-    db_list = []
-    for i, db in enumerate(databases):
-        db_list.append({
+    # islice stops after 15 names instead of listing every property first
+    db_list = [
+        {
             "index": i,
             "title": db.get("title", "Untitled"),
-            "properties": list(db.get("properties", {}).keys())[:15]
-        })
+            "properties": list(islice(db.get("properties") or (), 15))
+        }
+        for i, db in enumerate(databases)
+    ]
     
     prompt = render_prompt(
         "select_database",
@@ -55,50 +77,87 @@ def select_best_database(
         description=description,
         content_type=content_type,
         detailed_analysis=detailed_analysis,
-        databases_json=json.dumps(db_list, indent=2)
+        databases_json=prompt_json(db_list)
     )
 
+    messages = [
+        _SELECT_INSTRUCTIONS,
+        {"role": "user", "content": prompt}
+    ]
+    cache = get_llm_cache()
+    cache_key = make_cache_key("gpt-4o", messages, response_format=DATABASE_SELECTION_FORMAT)
+
     try:
-        log_ai_prompt("select_best_database", prompt)
-        
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=400
-        )
-        
-        ai_response = response.choices[0].message.content
-        log_ai_response("select_best_database", ai_response)
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            selection = DatabaseSelection.model_validate(cached)
+        else:
+            # Second tier: a differently-worded capture with the same meaning, in the same workspace
+            semantic_cache = get_semantic_cache()
+            embedding = None
+            workspace = namespace_key(db.get("id", "") for db in databases)
+            if semantic_cache.threshold <= 1:
+                embedding = await embed_text(f"{raw_input}\n{title}\n{content_type}")
+            
+            similar = semantic_cache.lookup(workspace, embedding) if embedding is not None else None
+            if similar is not None:
+                database = next((db for db in databases if db.get("id") == similar["database_id"]), None)
+                if database is not None:
+                    logger.info("AI selected database (semantic cache): %s", database.get('title'))
+                    return {
+                        "success": True,
+                        "database": database,
+                        "reason": similar["reason"],
+                        "confidence": similar["confidence"]
+                    }
+            
+            log_ai_prompt("select_best_database", prompt)
+            
+            response = await create_chat_completion(
+                client,
+                model="gpt-4o",
+                messages=messages,
+                response_format=DATABASE_SELECTION_FORMAT,
+                max_tokens=400
+            )
+            
+            ai_response = response.choices[0].message.content
+            log_ai_usage("select_best_database", response.usage)
+            log_ai_response("select_best_database", ai_response)
+            
+            # Parsed leniently so a reply cut off by max_tokens still yields the fields it got to
+            selection = DatabaseSelection.model_validate(extract_json(ai_response))
+            await cache.set(cache_key, selection.model_dump())
+            
+            index = selection.selected_index
+            if embedding is not None and _is_confident_match(selection, len(databases)):
+                semantic_cache.add(workspace, embedding, {
+                    "database_id": databases[index].get("id"),
+                    "reason": selection.reason,
+                    "confidence": selection.confidence
+                })
         
-        json_start = ai_response.find('{')
-        json_end = ai_response.rfind('}') + 1
+        index = selection.selected_index
+        confidence = selection.confidence
+        reason = selection.reason
         
-        if json_start >= 0 and json_end > json_start:
-            result = json.loads(ai_response[json_start:json_end])
-            found_match = result.get("found_match", False)
-            index = result.get("selected_index")
-            confidence = float(result.get("confidence", 0.0))
-            reason = result.get("reason", "No reason provided")
-            
-            if found_match and index is not None and 0 <= index < len(databases) and confidence >= 0.5:
-                print(f"AI selected database: {databases[index].get('title')} (confidence: {confidence:.2f})")
-                return {
-                    "success": True,
-                    "database": databases[index],
-                    "reason": reason,
-                    "confidence": confidence
-                }
-            else:
-                print(f"AI could not find fitting database: {reason}")
-                return {
-                    "success": False,
-                    "database": None,
-                    "reason": reason,
-                    "confidence": confidence
-                }
+        if _is_confident_match(selection, len(databases)):
+            logger.info("AI selected database: %s (confidence: %.2f)", databases[index].get('title'), confidence)
+            return {
+                "success": True,
+                "database": databases[index],
+                "reason": reason,
+                "confidence": confidence
+            }
         
-        return {"success": False, "database": None, "reason": "Parse failed", "confidence": 0.0}
+        logger.info("AI could not find fitting database: %s", reason)
+        return {
+            "success": False,
+            "database": None,
+            "reason": reason,
+            "confidence": confidence
+        }
         
     except Exception as e:
-        print(f"AI Database Selection Error: {e}")
+        logger.exception("AI Database Selection Error: %s", e)
         return {"success": False, "database": None, "reason": str(e), "confidence": 0.0}
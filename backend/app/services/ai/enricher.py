@@ -1,129 +1,167 @@
 """
-AI Enricher - Identifies researchable properties and enriches them
+AI Enricher - Researches and fills researchable properties
 """
-import json
-from typing import Dict, Any, List
+import logging
+from typing import Dict, Any, AsyncIterator, Final, List, Tuple
 
-from app.core import get_openai_client, get_local_datetime_context, log_ai_prompt, log_ai_response
-from app.services.ai.prompts.loader import render_prompt
+from app.core import get_async_openai_client, create_chat_completion, get_local_datetime_context, log_ai_prompt, log_ai_response
+from app.services.ai.batch import submit_batch
+from app.services.ai.llm_cache import get_llm_cache, make_cache_key
+from app.services.ai.prompts.loader import load_prompt, render_prompt, prompt_json
+from app.services.ai.response_parser import IncrementalJSONParser, aiter_stream_text, extract_json
 
+logger = logging.getLogger(__name__)
 
-def identify_researchable_properties(
+# Static system message, built once at import
+_ENRICH_INSTRUCTIONS: Final[Dict[str, str]] = {"role": "system", "content": load_prompt("enrich_properties_system")}
+
+# JSON schema for each researched value, by Notion property type (anything else is text)
+_VALUE_SCHEMAS = {
+    "number": {"type": "number"},
+    "checkbox": {"type": "boolean"},
+    "multi_select": {"type": "array", "items": {"type": "string"}},
+}
+
+
+def _enrichment_format(researchable_properties: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Strict response schema with one nullable key per researchable property"""
+    properties = {}
+    for prop in researchable_properties:
+        value_schema = _VALUE_SCHEMAS.get(prop.get("type"), {"type": "string"})
+        if prop.get("options") and prop.get("type") in ("select", "status"):
+            value_schema = {"type": "string", "enum": prop["options"]}
+        properties[prop["property"]] = {"anyOf": [value_schema, {"type": "null"}]}
+    
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "enriched_properties",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": properties,
+                "required": list(properties),
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+def build_enrichment_request(
     user_data: Dict[str, Any],
-    database_properties: Dict[str, Dict[str, Any]],
-    empty_properties: List[Dict[str, Any]]
-) -> List[Dict[str, Any]]:
-    """
-    Use AI to dynamically identify which empty properties could be researched/filled.
-    """
-    client = get_openai_client()
-    if not client or not empty_properties:
-        return []
+    researchable_properties: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Chat completion parameters for enriching one capture (also used as a Batch API body)"""
+    dt_context = get_local_datetime_context()
     
     raw_input = user_data.get("raw_input", user_data.get("source_text", ""))
     title = user_data.get("title", "")
     content_type = user_data.get("content_type", "")
     detailed_analysis = user_data.get("detailed_analysis", "")
     
-    empty_props_info = []
-    for prop in empty_properties:
-        prop_name = prop.get("property", "")
-        if prop_name in database_properties:
-            prop_info = database_properties[prop_name]
-            empty_props_info.append({
-                "name": prop_name,
-                "type": prop_info.get("type", "unknown"),
-                "options": prop_info.get("options", [])[:15] if prop_info.get("options") else None
-            })
-    
     prompt = render_prompt(
-        "identify_researchable",
+        "enrich_properties",
         raw_input=raw_input,
         title=title,
         content_type=content_type,
         detailed_analysis=detailed_analysis,
-        properties_json=json.dumps(empty_props_info, indent=2)
+        date=dt_context['date'],
+        properties_json=prompt_json(researchable_properties)
     )
+    
+    return {
+        "model": "gpt-4o",
+        "messages": [
+            _ENRICH_INSTRUCTIONS,
+            {"role": "user", "content": prompt}
+        ],
+        "response_format": _enrichment_format(researchable_properties),
+        "max_tokens": 1000,
+    }
 
-    try:
-        log_ai_prompt("identify_researchable_properties", prompt)
-        
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=1000
-        )
-        
-        ai_response = response.choices[0].message.content
-        log_ai_response("identify_researchable_properties", ai_response)
-        
-        json_start = ai_response.find('{')
-        json_end = ai_response.rfind('}') + 1
-        
-        if json_start >= 0 and json_end > json_start:
-            result = json.loads(ai_response[json_start:json_end])
-            researchable = result.get("researchable", [])
-            print(f"AI identified {len(researchable)} researchable properties")
-            return researchable
-        
-        return []
-        
-    except Exception as e:
-        print(f"AI Researchable Identification Error: {e}")
-        return []
+
+def parse_enrichment(ai_response: str) -> Dict[str, Any]:
+    """Researched values from an enrichment reply, without the ones the AI left null"""
+    enriched = extract_json(ai_response)
+    if enriched is None:
+        return {}
+    return {k: v for k, v in enriched.items() if v is not None}
 
 
-def enrich_properties(
+async def enrich_properties_stream(
     user_data: Dict[str, Any],
     researchable_properties: List[Dict[str, Any]]
-) -> Dict[str, Any]:
+) -> AsyncIterator[Dict[str, Any]]:
     """
-    Use AI to research and fill researchable properties.
+    Research and fill researchable properties, streaming the response.
+    
+    Yields {"partial": True, ...} with the values researched so far as each
+    property completes, then the final values (same shape as enrich_properties).
     """
-    client = get_openai_client()
+    client = get_async_openai_client()
     if not client or not researchable_properties:
-        return {}
+        yield {}
+        return
     
-    dt_context = get_local_datetime_context()
+    request = build_enrichment_request(user_data, researchable_properties)
+    cache = get_llm_cache()
+    cache_key = make_cache_key(**request)
     
-    raw_input = user_data.get("raw_input", user_data.get("source_text", ""))
-    title = user_data.get("title", "")
-    content_type = user_data.get("content_type", "")
-    detailed_analysis = user_data.get("detailed_analysis", "")
-    
-    prompt = render_prompt(
-        "enrich_properties",
-        raw_input=raw_input,
-        title=title,
-        content_type=content_type,
-        detailed_analysis=detailed_analysis,
-        date=dt_context['date'],
-        properties_json=json.dumps(researchable_properties, indent=2)
-    )
-
     try:
-        log_ai_prompt("enrich_properties", prompt)
+        result = await cache.get(cache_key)
+        if result is None:
+            log_ai_prompt("enrich_properties", request["messages"][-1]["content"])
+            
+            stream = await create_chat_completion(client, stream=True, **request)
+            
+            parser = IncrementalJSONParser()
+            try:
+                async for delta in aiter_stream_text(stream):
+                    partial = parser.feed(delta)
+                    if parser.complete:
+                        break
+                    if partial is not None:
+                        yield {"partial": True, **{k: v for k, v in partial.items() if v is not None}}
+            finally:
+                await stream.close()
+            
+            log_ai_response("enrich_properties", parser.text)
+            
+            result = parse_enrichment(parser.text)
+            if result:
+                await cache.set(cache_key, result)
         
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=1000
-        )
-        
-        ai_response = response.choices[0].message.content
-        log_ai_response("enrich_properties", ai_response)
-        
-        json_start = ai_response.find('{')
-        json_end = ai_response.rfind('}') + 1
-        
-        if json_start >= 0 and json_end > json_start:
-            enriched = json.loads(ai_response[json_start:json_end])
-            result = {k: v for k, v in enriched.items() if v is not None}
-            print(f"AI enriched {len(result)} properties")
-            return result
-        
-        return {}
+        logger.info("AI enriched %d properties", len(result))
+        yield result
         
     except Exception as e:
-        print(f"AI Enrichment Error: {e}")
-        return {}
+        logger.exception("AI Enrichment Error: %s", e)
+        yield {}
+
+
+async def enrich_properties(
+    user_data: Dict[str, Any],
+    researchable_properties: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Use AI to research and fill researchable properties.
+    """
+    result = {}
+    async for update in enrich_properties_stream(user_data, researchable_properties):
+        if not update.get("partial"):
+            result = update
+    return result
+
+
+async def enrich_properties_batch(items: Dict[str, Tuple[Dict[str, Any], List[Dict[str, Any]]]]) -> str:
+    """
+    Queue enrichment for several captures through the OpenAI Batch API.
+    
+    items maps a custom_id to (user_data, researchable_properties).
+    Returns the batch id; parse each output with parse_enrichment.
+    """
+    requests = [
+        {"custom_id": custom_id, "body": build_enrichment_request(user_data, researchable)}
+        for custom_id, (user_data, researchable) in items.items()
+    ]
+    return await submit_batch(requests)
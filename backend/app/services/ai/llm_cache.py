@@ -0,0 +1,128 @@
+"""
+LLM Cache - Reuses parsed AI responses for identical requests
+
+Keyed on sha256 of (model, messages, params). In-memory TTL + LRU by default;
+set REDIS_URL to share the cache between workers (needs the redis package).
+"""
+import logging
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+import orjson
+
+from app.config import settings
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(Protocol):
+    """Storage for cached AI responses (values are JSON-serializable)"""
+    
+    async def get(self, key: str) -> Optional[Any]: ...
+    
+    async def set(self, key: str, value: Any, ttl: int) -> None: ...
+
+
+class MemoryCacheBackend:
+    """Process-local TTL cache with LRU eviction"""
+    
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    async def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+class RedisCacheBackend:
+    """Redis-backed cache shared across worker processes"""
+    
+    def __init__(self, url: str):
+        self._redis = aioredis.from_url(url)
+    
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self._redis.get(f"llm:{key}")
+        return orjson.loads(raw) if raw is not None else None
+    
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        await self._redis.set(f"llm:{key}", orjson.dumps(value), ex=ttl)
+
+
+class LLMCache:
+    """Cache front-end with hit/miss counters - backend errors are treated as misses"""
+    
+    def __init__(self, backend: CacheBackend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+    
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            value = await self.backend.get(key)
+        except Exception as e:
+            logger.warning("⚠️ LLM cache read failed: %s", e)
+            value = None
+        
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+    
+    async def set(self, key: str, value: Any) -> None:
+        try:
+            await self.backend.set(key, value, self.ttl)
+        except Exception as e:
+            logger.warning("⚠️ LLM cache write failed: %s", e)
+    
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": type(self.backend).__name__, "hits": self.hits, "misses": self.misses}
+
+
+def make_cache_key(model: str, messages: List[Dict[str, Any]], **params) -> str:
+    """Deterministic key for a chat completion request"""
+    payload = orjson.dumps({"model": model, "messages": messages, **params}, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(payload).hexdigest()
+
+
+_cache: Optional[LLMCache] = None
+
+
+def get_llm_cache() -> LLMCache:
+    """Get or create the LLM response cache (lazy initialization)"""
+    global _cache
+    
+    if _cache is None:
+        if settings.redis_url and aioredis is not None:
+            backend = RedisCacheBackend(settings.redis_url)
+        else:
+            backend = MemoryCacheBackend(settings.llm_cache_size)
+        _cache = LLMCache(backend, settings.llm_cache_ttl)
+    
+    return _cache
@@ -0,0 +1,360 @@
+"""
+OCR - Text extraction from screenshots
+
+Prefers RapidOCR (PP-OCR models on ONNX Runtime) when it is installed - much
+faster than Tesseract on UI screenshots. Set OCR_FALLBACK=1 to force Tesseract.
+
+For Tesseract, uses an in-process API (tesserocr) when it is installed, so the
+language model is loaded once per process instead of forking a tesseract
+binary per screenshot. Falls back to pytesseract otherwise.
+
+With tesserocr, OCR runs in a small process pool (one resident API per
+worker) so concurrent screenshots use multiple cores despite the GIL.
+pytesseract already runs tesseract as a subprocess, so threads suffice there.
+"""
+import logging
+import io
+import os
+import asyncio
+import hashlib
+import tempfile
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+from PIL import Image, ImageOps, ImageStat, UnidentifiedImageError
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Must be set before libtesseract loads - OpenMP threading slows down single-image OCR
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+try:
+    from tesserocr import PyTessBaseAPI, OEM
+except ImportError:
+    PyTessBaseAPI = None
+    import pytesseract
+
+try:
+    import numpy as np
+    from rapidocr_onnxruntime import RapidOCR
+except ImportError:
+    RapidOCR = None
+
+USE_RAPIDOCR = RapidOCR is not None and not settings.ocr_fallback
+
+_rapid_engine = None
+_rapid_engine_lock = threading.Lock()
+
+# LSTM-only engine; inversion is skipped since _prepare_image already normalizes to dark-on-light
+TESSERACT_CONFIG = f"--oem 1 --psm {settings.tesseract_psm} -c tessedit_do_invert=0"
+
+_tess_api = None
+# The Tesseract API object is not thread-safe
+_tess_lock = threading.Lock()
+
+# LRU of image digest -> OCR text, so re-captures of the same screenshot skip Tesseract
+OCR_CACHE_SIZE = 256
+_ocr_cache: "OrderedDict[bytes, str]" = OrderedDict()
+_ocr_cache_lock = threading.Lock()
+
+# Upper bound on screenshots OCR'd in one Tesseract batch
+OCR_BATCH_MAX = 16
+
+# OCR worker processes (tesserocr only)
+OCR_WORKERS = min(4, os.cpu_count() or 1)
+_ocr_pool: Optional[ProcessPoolExecutor] = None
+_ocr_pool_lock = threading.Lock()
+
+# Longest side fed to Tesseract - retina screenshots are 3000+ px and OCR time scales with area
+OCR_MAX_SIZE = 2000
+_BINARIZE_LUT = [255 if p > 128 else 0 for p in range(256)]
+
+# Screenshot formats we accept - skips probing every other PIL codec
+IMAGE_FORMATS = ("PNG", "JPEG", "WEBP")
+
+
+def _get_tess_api():
+    """Get or create the process-wide Tesseract API (call with _tess_lock held)"""
+    global _tess_api
+    
+    if _tess_api is None:
+        _tess_api = PyTessBaseAPI(psm=settings.tesseract_psm, oem=OEM.LSTM_ONLY)
+        _tess_api.SetVariable("tessedit_do_invert", "0")
+    
+    return _tess_api
+
+
+def _get_rapid_engine():
+    """Get or create the process-wide RapidOCR engine (models load once)"""
+    global _rapid_engine
+    
+    if _rapid_engine is None:
+        with _rapid_engine_lock:
+            # Re-check: another thread may have created it while we waited
+            if _rapid_engine is None:
+                _rapid_engine = RapidOCR()
+    
+    return _rapid_engine
+
+
+def _run_rapidocr(image_data: bytes) -> str:
+    """Run RapidOCR on raw image bytes - returns detected lines top to bottom"""
+    image = open_screenshot(image_data, "RGB", OCR_MAX_SIZE)
+    result, _ = _get_rapid_engine()(np.asarray(image))
+    if not result:
+        return ""
+    return "\n".join(line[1] for line in result)
+
+
+def _init_ocr_worker():
+    """Create the worker's own Tesseract API up front (never share one across a fork)"""
+    global _tess_api
+    _tess_api = None
+    with _tess_lock:
+        _get_tess_api()
+
+
+def _get_ocr_pool() -> Optional[ProcessPoolExecutor]:
+    """Get or create the OCR process pool - None unless running on tesserocr"""
+    global _ocr_pool
+    
+    if USE_RAPIDOCR or PyTessBaseAPI is None:
+        return None
+    
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            # spawn: forking a process that is running server threads is unsafe
+            _ocr_pool = ProcessPoolExecutor(
+                max_workers=OCR_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_ocr_worker
+            )
+    
+    return _ocr_pool
+
+
+def close_ocr_pool():
+    """Shut down the OCR worker processes (called on app shutdown)"""
+    global _ocr_pool
+    
+    with _ocr_pool_lock:
+        if _ocr_pool is not None:
+            _ocr_pool.shutdown(wait=False, cancel_futures=True)
+            _ocr_pool = None
+
+
+def _cache_get(key: bytes):
+    """Look up cached OCR text, marking it most recently used"""
+    with _ocr_cache_lock:
+        text = _ocr_cache.get(key)
+        if text is not None:
+            _ocr_cache.move_to_end(key)
+        return text
+
+
+def _cache_put(key: bytes, text: str):
+    """Store OCR text, evicting the least recently used entry when full"""
+    with _ocr_cache_lock:
+        _ocr_cache[key] = text
+        _ocr_cache.move_to_end(key)
+        if len(_ocr_cache) > OCR_CACHE_SIZE:
+            _ocr_cache.popitem(last=False)
+
+
+def open_screenshot(image_data: bytes, mode: str, max_size: int) -> Image.Image:
+    """
+    Decode a screenshot into the given mode, no larger than max_size on either side.
+    JPEGs are downsampled by libjpeg during decode (draft mode) instead of after a full-size decode.
+    
+    Corrupt or truncated uploads fail in the cheap verify pass (UnidentifiedImageError
+    for non-image bytes, OSError/SyntaxError for damaged ones) before any pixel decoding.
+    """
+    # verify() checks structure without decoding pixels; the image can't be used afterwards
+    with Image.open(io.BytesIO(image_data), formats=IMAGE_FORMATS) as probe:
+        probe.verify()
+    
+    with Image.open(io.BytesIO(image_data), formats=IMAGE_FORMATS) as image:
+        if image.format == "JPEG":
+            image.draft(mode, (max_size, max_size))
+        image.thumbnail((max_size, max_size), Image.LANCZOS)
+        image.load()
+        return image.convert(mode) if image.mode != mode else image
+
+
+def _prepare_image(image_data: bytes) -> Image.Image:
+    """Downscale, grayscale and binarize a screenshot for Tesseract"""
+    image = ImageOps.autocontrast(open_screenshot(image_data, "L", OCR_MAX_SIZE))
+    # Dark-mode screenshots: Tesseract wants dark text on a light background
+    if ImageStat.Stat(image).mean[0] < 128:
+        image = ImageOps.invert(image)
+    return image.point(_BINARIZE_LUT)
+
+
+def _run_ocr(image_data: bytes) -> str:
+    """Run OCR on raw image bytes"""
+    if USE_RAPIDOCR:
+        return _run_rapidocr(image_data)
+    
+    image = _prepare_image(image_data)
+    
+    if PyTessBaseAPI is None:
+        return pytesseract.image_to_string(image, config=TESSERACT_CONFIG).strip()
+    
+    with _tess_lock:
+        api = _get_tess_api()
+        api.SetImage(image)
+        return api.GetUTF8Text().strip()
+
+
+def _run_ocr_batch(images: List[bytes]) -> List[str]:
+    """
+    OCR several images in one go.
+    With tesserocr the resident API is reused under a single lock; with pytesseract
+    all images go through one tesseract invocation via a file list, which pays
+    process start-up and model load once for the whole batch.
+    """
+    if len(images) == 1 or USE_RAPIDOCR:
+        return [_run_ocr(image_data) for image_data in images]
+    
+    if PyTessBaseAPI is not None:
+        texts = []
+        with _tess_lock:
+            api = _get_tess_api()
+            for image_data in images:
+                api.SetImage(_prepare_image(image_data))
+                texts.append(api.GetUTF8Text().strip())
+        return texts
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = []
+        for i, image_data in enumerate(images):
+            path = Path(tmp_dir) / f"capture_{i}.png"
+            _prepare_image(image_data).save(path)
+            paths.append(str(path))
+        list_path = Path(tmp_dir) / "images.txt"
+        list_path.write_text("\n".join(paths) + "\n")
+        output = pytesseract.image_to_string(str(list_path), config=TESSERACT_CONFIG)
+    
+    # Tesseract separates pages with a form feed
+    pages = output.split("\f")
+    if len(pages) < len(images):
+        raise ValueError(f"Expected {len(images)} OCR pages, got {len(pages)}")
+    return [page.strip() for page in pages[:len(images)]]
+
+
+class OCRBatcher:
+    """
+    Coalesces concurrent OCR requests into Tesseract batches.
+    
+    A lone capture is processed immediately (no added latency); captures that
+    arrive while a batch is running queue up and are OCR'd together next.
+    """
+    
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+    
+    async def submit(self, image_data: bytes) -> str:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        
+        future = loop.create_future()
+        await self._queue.put((image_data, future))
+        return await future
+    
+    async def _run(self):
+        while True:
+            batch: List[Tuple[bytes, asyncio.Future]] = [await self._queue.get()]
+            while len(batch) < OCR_BATCH_MAX and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            
+            images = [image_data for image_data, _ in batch]
+            try:
+                texts = await _run_ocr_batch_parallel(images)
+            except Exception as e:
+                logger.warning("OCR batch of %d failed, retrying individually: %s", len(images), e)
+                # Per-image errors are handed to their callers, which decide what (not) to cache
+                texts = await asyncio.gather(
+                    *(asyncio.to_thread(_ocr_single, image_data) for image_data in images),
+                    return_exceptions=True
+                )
+            
+            for (_, future), text in zip(batch, texts):
+                if future.done():
+                    continue
+                if isinstance(text, Exception):
+                    future.set_exception(text)
+                else:
+                    future.set_result(text)
+
+
+async def _run_ocr_batch_parallel(images: List[bytes]) -> List[str]:
+    """Run a batch on the OCR pool, split across its workers (or in a thread on pytesseract)"""
+    pool = _get_ocr_pool()
+    if pool is None:
+        return await asyncio.to_thread(_run_ocr_batch, images)
+    
+    loop = asyncio.get_running_loop()
+    chunk_size = -(-len(images) // OCR_WORKERS)
+    chunks = [images[i:i + chunk_size] for i in range(0, len(images), chunk_size)]
+    results = await asyncio.gather(*(loop.run_in_executor(pool, _run_ocr_batch, chunk) for chunk in chunks))
+    return [text for chunk_texts in results for text in chunk_texts]
+
+
+_batcher = OCRBatcher()
+
+
+def _ocr_single(image_data: bytes) -> str:
+    """OCR one image on the pool (or inline) - raises on failure"""
+    pool = _get_ocr_pool()
+    return pool.submit(_run_ocr, image_data).result() if pool is not None else _run_ocr(image_data)
+
+
+def extract_text_ocr(image_data: bytes) -> str:
+    """Extract text from image using OCR (cached by image content)"""
+    # blake2b is faster than sha256/md5 and collision-safe at 16 bytes for a cache key
+    key = hashlib.blake2b(image_data, digest_size=16).digest()
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+    
+    try:
+        text = _ocr_single(image_data)
+    except UnidentifiedImageError:
+        logger.info("OCR skipped: not a PNG/JPEG/WEBP image")
+        return ""
+    except Exception as e:
+        logger.exception("OCR Error: %s", e)
+        return ""
+    
+    _cache_put(key, text)
+    return text
+
+
+async def extract_text_ocr_async(image_data: bytes) -> str:
+    """Extract text from image using OCR, batched with other concurrent captures"""
+    key = hashlib.blake2b(image_data, digest_size=16).digest()
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+    
+    try:
+        text = await _batcher.submit(image_data)
+    except UnidentifiedImageError:
+        logger.info("OCR skipped: not a PNG/JPEG/WEBP image")
+        return ""
+    except Exception as e:
+        logger.exception("OCR Error: %s", e)
+        return ""
+    
+    _cache_put(key, text)
+    return text
@@ -1,8 +1,12 @@
 """
 Prompt Loader - Loads and renders prompt templates from files
 """
+import sys
+from collections import ChainMap
 from pathlib import Path
 from functools import lru_cache
+from typing import Any, Dict, Mapping, Optional, Tuple
+import orjson
 
 PROMPTS_DIR = Path(__file__).parent
 
@@ -16,20 +20,46 @@ def load_prompt(name: str) -> str:
     path = PROMPTS_DIR / f"{name}.txt"
     if not path.exists():
         raise FileNotFoundError(f"Prompt template not found: {path}")
-    return path.read_text()
+    return sys.intern(path.read_text())
 
 
-def render_prompt(name: str, **kwargs) -> str:
+def render_prompt(name: str, context: Optional[Mapping[str, Any]] = None, **kwargs) -> str:
     """
     Load and render a prompt template with variables.
     
     Args:
         name: Template name (without .txt extension)
-        **kwargs: Variables to substitute in the template
+        context: Shared variables (e.g. the datetime context), looked up without copying
+        **kwargs: Variables to substitute in the template (take precedence over context)
         
     Returns:
         Rendered prompt string
     """
     template = load_prompt(name)
-    return template.format(**kwargs)
+    if context is None:
+        return template.format_map(kwargs)
+    return template.format_map(ChainMap(kwargs, context))
 
+
+@lru_cache(maxsize=None)
+def load_examples(name: str) -> Tuple[Dict[str, str], ...]:
+    """
+    Load few-shot examples for a prompt as chat messages.
+    
+    {name}_examples.json holds a fixed "now" datetime context and input/output
+    pairs; each input is rendered with the {name} template, each output becomes
+    the assistant's JSON reply.
+    """
+    path = PROMPTS_DIR / f"{name}_examples.json"
+    data = orjson.loads(path.read_bytes())
+    
+    messages = []
+    for example in data["examples"]:
+        messages.append({"role": "user", "content": render_prompt(name, data["now"], text=example["input"])})
+        messages.append({"role": "assistant", "content": orjson.dumps(example["output"]).decode()})
+    return tuple(messages)
+
+
+def prompt_json(data: Any) -> str:
+    """Serialize data as indented JSON for embedding in a prompt"""
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS, default=str).decode()
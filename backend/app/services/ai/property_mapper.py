@@ -1,198 +1,312 @@
 """
 AI Property Mapper - Maps user data to Notion database properties
 """
-import json
-from typing import Dict, Any, Optional
+import logging
+import asyncio
+from typing import Dict, Any, Final, List, Optional, Set, Tuple
 
-from app.core import get_openai_client, get_local_datetime_context, log_ai_prompt, log_ai_response
-from app.services.ai.prompts.loader import render_prompt
+from app.core import get_async_openai_client, create_chat_completion, get_local_datetime_context, log_ai_prompt, log_ai_response
+from app.schemas.capture import PropertyAnalysis, PropertyAnalysisBatch
+from app.services.ai.llm_cache import get_llm_cache, make_cache_key
+from app.services.ai.prompts.loader import load_prompt, render_prompt, prompt_json
+from app.services.ai.response_parser import aread_json_stream, extract_json
+from app.services.notion.properties import build_property_value
 
+logger = logging.getLogger(__name__)
 
-def _convert_to_notion_value(prop_type: str, value: Any, prop_info: Dict) -> Optional[Dict]:
-    """Convert a value to Notion property format"""
-    if value is None:
-        return None
-    
-    try:
-        if prop_type == "title":
-            return {"title": [{"text": {"content": str(value)[:2000]}}]}
-        
-        elif prop_type == "rich_text":
-            return {"rich_text": [{"text": {"content": str(value)[:2000]}}]}
-        
-        elif prop_type == "number":
-            try:
-                return {"number": float(value)}
-            except:
-                return None
-        
-        elif prop_type == "select":
-            options = prop_info.get("options", [])
-            str_val = str(value).strip()
-            # Try exact match
-            for opt in options:
-                if opt.lower() == str_val.lower():
-                    return {"select": {"name": opt}}
-            # Use as-is (Notion creates new option)
-            return {"select": {"name": str_val[:100]}}
-        
-        elif prop_type == "multi_select":
-            if isinstance(value, list):
-                tags = [{"name": str(t)[:100]} for t in value[:10]]
-            else:
-                tags = [{"name": str(value)[:100]}]
-            return {"multi_select": tags}
-        
-        elif prop_type == "status":
-            options = prop_info.get("options", [])
-            str_val = str(value).strip()
-            for opt in options:
-                if opt.lower() == str_val.lower():
-                    return {"status": {"name": opt}}
-            if options:
-                return {"status": {"name": options[0]}}
-            return None
-        
-        elif prop_type == "date":
-            date_str = str(value)
-            if 'T' in date_str:
-                # Keep timezone offset if present
-                if '+' in date_str or date_str.endswith('Z'):
-                    return {"date": {"start": date_str}}
-                else:
-                    return {"date": {"start": date_str[:19]}}
-            else:
-                return {"date": {"start": date_str[:10]}}
-        
-        elif prop_type == "checkbox":
-            if isinstance(value, bool):
-                return {"checkbox": value}
-            return {"checkbox": str(value).lower() in ['true', 'yes', '1']}
-        
-        elif prop_type == "url":
-            return {"url": str(value)}
-        
-        elif prop_type == "email":
-            return {"email": str(value)}
-        
-        elif prop_type == "phone_number":
-            return {"phone_number": str(value)}
-        
-        return None
-        
-    except Exception as e:
-        print(f"Convert error for {prop_type}: {e}")
-        return None
+# Static system message - instructions and JSON contract never change between calls
+_PROPERTY_INSTRUCTIONS: Final[Dict[str, str]] = {"role": "system", "content": load_prompt("analyze_properties_system")}
 
+# Properties Notion computes itself - never offered to the AI
+AUTO_PROPERTY_TYPES = ("formula", "rollup", "created_time", "created_by", "last_edited_time", "last_edited_by")
 
-def map_properties_dynamically(
-    user_data: Dict[str, Any],
-    database_properties: Dict[str, Dict[str, Any]]
-) -> Dict[str, Any]:
-    """
-    Use AI to dynamically map user data to database properties.
-    No hardcoded aliases - AI reasons about each property.
-    """
-    client = get_openai_client()
-    if not client:
-        return {
-            "properties": {},
-            "filled_from_user": [],
-            "left_empty": list(database_properties.keys()),
-            "ai_reasoning": "OpenAI not available"
-        }
-    
-    dt_context = get_local_datetime_context()
-    
-    # Build property list with types and options
+PROPERTY_ANALYSIS_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "property_analysis", "strict": True, "schema": PropertyAnalysis.model_json_schema()},
+}
+
+PROPERTY_ANALYSIS_BATCH_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "property_analysis_batch", "strict": True, "schema": PropertyAnalysisBatch.model_json_schema()},
+}
+
+# Bulk captures are collected for up to PROPERTY_BATCH_WINDOW seconds and
+# analyzed PROPERTY_BATCH_MAX at a time in one call
+PROPERTY_BATCH_WINDOW = 2.0
+PROPERTY_BATCH_MAX = 10
+
+
+def _empty_result(reasoning: str, left_empty: Optional[List] = None) -> Dict[str, Any]:
+    return {
+        "properties": {},
+        "filled_from_user": [],
+        "left_empty": left_empty if left_empty is not None else [],
+        "researchable": [],
+        "ai_reasoning": reasoning
+    }
+
+
+def _props_for_prompt(database_properties: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Property list with types and options (computed properties left out)"""
     props_info = []
     for prop_name, prop_data in database_properties.items():
         prop_type = prop_data.get("type", "unknown")
-        # Skip auto-generated properties
-        if prop_type in ["formula", "rollup", "created_time", "created_by", "last_edited_time", "last_edited_by"]:
+        if prop_type in AUTO_PROPERTY_TYPES:
             continue
         props_info.append({
             "name": prop_name,
             "type": prop_type,
             "options": prop_data.get("options", [])[:20] if prop_data.get("options") else None
         })
+    return props_info
+
+
+def _user_data_for_prompt(user_data: Dict[str, Any]) -> Dict[str, Any]:
+    """User data without internal fields"""
+    return {
+        k: v for k, v in user_data.items()
+        if k not in ['raw_response', 'success'] and v is not None
+    }
+
+
+def _apply_analysis(analysis: PropertyAnalysis, database_properties: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Turn the AI's mappings into Notion property values and split out researchable properties"""
+    mapped_properties = {}
+    filled_from_user = []
     
-    raw_input = user_data.get("raw_input", user_data.get("source_text", ""))
+    for mapping in analysis.mappings:
+        prop_name = mapping.property
+        if prop_name not in database_properties:
+            continue
+        
+        prop_info = database_properties[prop_name]
+        prop_type = prop_info.get("type", "rich_text")
+        
+        notion_value = build_property_value(prop_type, mapping.value, prop_info)
+        if notion_value:
+            mapped_properties[prop_name] = notion_value
+            filled_from_user.append({
+                "property": prop_name,
+                "value": str(mapping.value)[:100],
+                "source": mapping.source,
+                "reasoning": mapping.reasoning,
+                "type": prop_type
+            })
     
-    # Prepare user data for prompt (filter out internal fields)
-    user_data_filtered = {
-        k: v for k, v in user_data.items() 
-        if k not in ['raw_response', 'success'] and v is not None
+    # Split unmapped properties locally instead of asking the AI a second time
+    left_empty = []
+    researchable = []
+    for unmapped in analysis.unmapped:
+        prop_info = database_properties.get(unmapped.property)
+        if prop_info is None or unmapped.property in mapped_properties:
+            continue
+        
+        prop_type = prop_info.get("type", "unknown")
+        left_empty.append({"property": unmapped.property, "type": prop_type})
+        if unmapped.researchable:
+            researchable.append({
+                "property": unmapped.property,
+                "type": prop_type,
+                "options": prop_info.get("options", [])[:15] if prop_info.get("options") else None,
+                "reasoning": unmapped.reasoning
+            })
+    
+    logger.info("AI mapped %d properties, %d researchable", len(mapped_properties), len(researchable))
+    
+    return {
+        "properties": mapped_properties,
+        "filled_from_user": filled_from_user,
+        "left_empty": left_empty,
+        "researchable": researchable,
+        "ai_reasoning": analysis.overall_reasoning
     }
+
+
+async def _analyze_one(
+    user_data: Dict[str, Any],
+    database_properties: Dict[str, Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Property analysis for a single capture"""
+    client = get_async_openai_client()
+    if not client:
+        return _empty_result("OpenAI not available", left_empty=list(database_properties.keys()))
     
     prompt = render_prompt(
-        "map_properties",
-        raw_input=raw_input,
-        datetime_iso=dt_context['datetime_iso'],
-        date=dt_context['date'],
-        time=dt_context['time'],
-        timezone=dt_context['timezone'],
-        user_data_json=json.dumps(user_data_filtered, indent=2, default=str),
-        properties_json=json.dumps(props_info, indent=2)
+        "analyze_properties",
+        get_local_datetime_context(),
+        raw_input=user_data.get("raw_input", user_data.get("source_text", "")),
+        user_data_json=prompt_json(_user_data_for_prompt(user_data)),
+        properties_json=prompt_json(_props_for_prompt(database_properties))
     )
-
+    
+    # Static instructions first so OpenAI's prompt cache can reuse the prefix across requests
+    messages = [
+        _PROPERTY_INSTRUCTIONS,
+        {"role": "user", "content": prompt}
+    ]
+    cache = get_llm_cache()
+    cache_key = make_cache_key("gpt-4o", messages, response_format=PROPERTY_ANALYSIS_FORMAT)
+    
     try:
-        log_ai_prompt("map_properties_dynamically", prompt)
-        
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=2000
-        )
+        cached = await cache.get(cache_key)
+        if cached is not None:
+            analysis = PropertyAnalysis.model_validate(cached)
+        else:
+            log_ai_prompt("analyze_properties", prompt)
+            
+            response = await create_chat_completion(
+                client,
+                model="gpt-4o",
+                messages=messages,
+                response_format=PROPERTY_ANALYSIS_FORMAT,
+                max_tokens=2000,
+                stream=True
+            )
+            
+            ai_response = await aread_json_stream(response)
+            log_ai_response("analyze_properties", ai_response)
+            
+            analysis = PropertyAnalysis.model_validate(extract_json(ai_response))
+            await cache.set(cache_key, analysis.model_dump())
         
-        ai_response = response.choices[0].message.content
-        log_ai_response("map_properties_dynamically", ai_response)
+        return _apply_analysis(analysis, database_properties)
         
-        json_start = ai_response.find('{')
-        json_end = ai_response.rfind('}') + 1
+    except Exception as e:
+        logger.exception("AI Property Analysis Error: %s", e)
+        return _empty_result(str(e))
+
+
+async def analyze_properties_batch(
+    items: List[Tuple[str, Dict[str, Any], Dict[str, Dict[str, Any]]]]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Property analysis for several captures in one AI call.
+    
+    items are (id, user_data, database_properties); returns {id: result} with
+    results shaped like analyze_properties. Captures the combined reply
+    doesn't cover are analyzed individually.
+    """
+    if len(items) == 1:
+        item_id, user_data, database_properties = items[0]
+        return {item_id: await _analyze_one(user_data, database_properties)}
+    
+    client = get_async_openai_client()
+    results: Dict[str, Dict[str, Any]] = {}
+    
+    if client and items:
+        items_json = prompt_json([
+            {
+                "id": item_id,
+                "raw_input": user_data.get("raw_input", user_data.get("source_text", "")),
+                "user_data": _user_data_for_prompt(user_data),
+                "properties": _props_for_prompt(database_properties),
+            }
+            for item_id, user_data, database_properties in items
+        ])
+        prompt = render_prompt("analyze_properties_batch", get_local_datetime_context(), items_json=items_json)
         
-        if json_start >= 0 and json_end > json_start:
-            result = json.loads(ai_response[json_start:json_end])
-            
-            mapped_properties = {}
-            filled_from_user = []
-            
-            for mapping in result.get("mappings", []):
-                prop_name = mapping.get("property")
-                value = mapping.get("value")
-                
-                if prop_name and value is not None and prop_name in database_properties:
-                    prop_info = database_properties[prop_name]
-                    prop_type = prop_info.get("type", "rich_text")
-                    
-                    notion_value = _convert_to_notion_value(prop_type, value, prop_info)
-                    if notion_value:
-                        mapped_properties[prop_name] = notion_value
-                        filled_from_user.append({
-                            "property": prop_name,
-                            "value": str(value)[:100],
-                            "source": mapping.get("source", "ai"),
-                            "reasoning": mapping.get("reasoning", ""),
-                            "type": prop_type
-                        })
+        try:
+            log_ai_prompt("analyze_properties_batch", prompt)
             
-            left_empty = [
-                {"property": p, "type": database_properties[p].get("type", "unknown")}
-                for p in result.get("unmapped_properties", [])
-                if p in database_properties
-            ]
+            response = await create_chat_completion(
+                client,
+                model="gpt-4o",
+                messages=[_PROPERTY_INSTRUCTIONS, {"role": "user", "content": prompt}],
+                response_format=PROPERTY_ANALYSIS_BATCH_FORMAT,
+                max_tokens=min(16000, 2000 * len(items)),
+                stream=True
+            )
             
-            print(f"AI mapped {len(mapped_properties)} properties dynamically")
+            ai_response = await aread_json_stream(response)
+            log_ai_response("analyze_properties_batch", ai_response)
             
-            return {
-                "properties": mapped_properties,
-                "filled_from_user": filled_from_user,
-                "left_empty": left_empty,
-                "ai_reasoning": result.get("overall_reasoning", "")
-            }
-        
-        return {"properties": {}, "filled_from_user": [], "left_empty": [], "ai_reasoning": "Parse failed"}
+            batch = PropertyAnalysisBatch.model_validate(extract_json(ai_response))
+            properties_by_id = {item_id: database_properties for item_id, _, database_properties in items}
+            for item in batch.results:
+                if item.id in properties_by_id and item.id not in results:
+                    results[item.id] = _apply_analysis(item.analysis, properties_by_id[item.id])
+        except Exception as e:
+            logger.warning("AI Property Analysis batch of %d failed, retrying individually: %s", len(items), e)
+    
+    missing = [item for item in items if item[0] not in results]
+    if missing:
+        fallback = await asyncio.gather(*(_analyze_one(user_data, props) for _, user_data, props in missing))
+        results.update((item_id, result) for (item_id, _, _), result in zip(missing, fallback))
+    
+    return results
+
+
+class PropertyAnalysisBatcher:
+    """
+    Collects concurrent bulk property analyses into combined AI calls.
+    
+    The first request opens a PROPERTY_BATCH_WINDOW; everything submitted
+    until it closes (up to PROPERTY_BATCH_MAX) goes out as one call, while
+    the next window already collects.
+    """
+    
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+    
+    async def submit(self, user_data: Dict[str, Any], database_properties: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
         
-    except Exception as e:
-        print(f"AI Property Mapping Error: {e}")
-        return {"properties": {}, "filled_from_user": [], "left_empty": [], "ai_reasoning": str(e)}
+        future = loop.create_future()
+        await self._queue.put((user_data, database_properties, future))
+        return await future
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + PROPERTY_BATCH_WINDOW
+            while len(batch) < PROPERTY_BATCH_MAX:
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    break
+            
+            task = loop.create_task(self._analyze(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+    
+    @staticmethod
+    async def _analyze(batch: List[Tuple[Dict[str, Any], Dict[str, Dict[str, Any]], asyncio.Future]]):
+        results = await analyze_properties_batch([
+            (str(i), user_data, database_properties)
+            for i, (user_data, database_properties, _) in enumerate(batch)
+        ])
+        for i, (_, _, future) in enumerate(batch):
+            if not future.done():
+                future.set_result(results[str(i)])
+
+
+_batcher = PropertyAnalysisBatcher()
+
+
+async def analyze_properties(
+    user_data: Dict[str, Any],
+    database_properties: Dict[str, Dict[str, Any]],
+    batched: bool = False
+) -> Dict[str, Any]:
+    """
+    Use AI to map user data to database properties and, in the same call,
+    flag which unmapped properties could be researched.
+    No hardcoded aliases - AI reasons about each property.
+    
+    batched=True lets the call wait briefly to share one AI request with
+    other bulk captures (see PropertyAnalysisBatcher).
+    
+    Returns properties / filled_from_user / left_empty / ai_reasoning, plus
+    "researchable": [{property, type, options, reasoning}] ready for enrich_properties.
+    """
+    if batched:
+        return await _batcher.submit(user_data, database_properties)
+    return await _analyze_one(user_data, database_properties)
@@ -0,0 +1,239 @@
+"""
+AI Response Parser - Incremental JSON handling for streamed completions
+"""
+import io
+from typing import Dict, Any, AsyncIterator, Iterator, Optional
+import orjson
+
+# Characters of an unquoted JSON value (numbers, true/false/null)
+_LITERAL_CHARS = "0123456789+-.eEtrufalsn"
+
+
+class IncrementalJSONParser:
+    """
+    Scans a streamed JSON object chunk by chunk.
+
+    Tracks string/brace state so it knows when each top-level field is
+    complete and when the outermost object closes - without re-parsing
+    the whole buffer on every chunk. Any prose before the first '{' is ignored.
+    """
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._pos = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.complete = False
+
+    @property
+    def text(self) -> str:
+        """Everything received so far"""
+        return self._buffer.getvalue()
+
+    def feed(self, chunk: str) -> Optional[Dict[str, Any]]:
+        """
+        Consume a chunk of streamed text.
+
+        Returns the object parsed so far whenever a top-level field (or the
+        whole object) completes in this chunk, otherwise None.
+        """
+        if self.complete or not chunk:
+            return None
+
+        offset = self._pos
+        self._buffer.write(chunk)
+        self._pos += len(chunk)
+
+        field_end = -1
+        for i, ch in enumerate(chunk):
+            if self._start < 0:
+                if ch == '{':
+                    self._start = offset + i
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == '\\':
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self.complete = True
+                    end = offset + i + 1
+                    self._buffer.truncate(end)
+                    self._pos = end
+                    return self._loads(self.text[self._start:end])
+            elif ch == ',' and self._depth == 1:
+                field_end = offset + i
+
+        if field_end >= 0:
+            # Everything up to the last top-level comma is a closed object once '}' is appended
+            return self._loads(self.text[self._start:field_end] + "}")
+        return None
+
+    @staticmethod
+    def _loads(span: str) -> Optional[Dict[str, Any]]:
+        try:
+            data = orjson.loads(span)
+        except orjson.JSONDecodeError:
+            return None
+        return data if isinstance(data, dict) else None
+
+
+def repair_json(response: str) -> Optional[str]:
+    """
+    Recover the JSON object from an AI response in a single pass.
+    
+    Skips prose/markdown fences before the first '{' and anything after the
+    object closes. If the response was cut off (max_tokens), the open string
+    and brackets are closed; if that still doesn't parse, a half-written
+    value literal is replaced with null, and failing that the object is cut
+    back to the last comma or opening bracket. Returns None when nothing
+    usable is left.
+    """
+    start = response.find('{')
+    if start < 0:
+        return None
+    
+    closers = []
+    cuts = []  # (end, closers) - prefixes that are valid once closed
+    in_string = False
+    escaped = False
+    for i in range(start, len(response)):
+        ch = response[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            closers.append('}' if ch == '{' else ']')
+            cuts.append((i + 1, "".join(reversed(closers))))
+        elif ch in '}]':
+            if closers:
+                closers.pop()
+            if not closers:
+                return response[start:i + 1]
+        elif ch == ',':
+            cuts.append((i, "".join(reversed(closers))))
+    
+    # Truncated - close whatever is still open
+    body = response[start:]
+    if escaped:
+        body = body[:-1]
+    if in_string:
+        body += '"'
+    body = body.rstrip()
+    if body.endswith(','):
+        body = body[:-1]
+    elif body.endswith(':'):
+        body += 'null'
+    
+    candidate = body + "".join(reversed(closers))
+    if _is_json(candidate):
+        return candidate
+    
+    # Half-written literal ("tr", "1.", "nul") - keep the key, drop the value
+    head = body.rstrip(_LITERAL_CHARS).rstrip()
+    if head != body and head.endswith(':'):
+        candidate = head + " null" + "".join(reversed(closers))
+        if _is_json(candidate):
+            return candidate
+    
+    # Dangling key - drop the last incomplete member, or empty the innermost open object
+    for cut, cut_closers in reversed(cuts):
+        candidate = response[start:cut] + cut_closers
+        if _is_json(candidate):
+            return candidate
+    return None
+
+
+
+def _is_json(text: str) -> bool:
+    try:
+        orjson.loads(text)
+    except orjson.JSONDecodeError:
+        return False
+    return True
+
+
+def extract_json(response: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse the JSON object in an AI response.
+    
+    Models are told to return JSON only, so the whole response is tried first;
+    only if that fails is the object recovered with repair_json. Returns None
+    when there is no object; raises JSONDecodeError when the span is malformed.
+    """
+    try:
+        data = orjson.loads(response)
+        if isinstance(data, dict):
+            return data
+    except orjson.JSONDecodeError:
+        pass
+    
+    span = repair_json(response)
+    if span is None:
+        return None
+    return orjson.loads(span)
+
+
+def iter_stream_text(stream) -> Iterator[str]:
+    """Yield the text deltas of a streamed chat completion"""
+    for chunk in stream:
+        if chunk.choices:
+            content = chunk.choices[0].delta.content
+            if content:
+                yield content
+
+
+def read_json_stream(stream) -> str:
+    """
+    Accumulate a streamed chat completion's text.
+    Stops reading as soon as the outermost JSON object closes.
+    """
+    parser = IncrementalJSONParser()
+    try:
+        for text in iter_stream_text(stream):
+            parser.feed(text)
+            if parser.complete:
+                break
+    finally:
+        stream.close()
+    return parser.text
+
+
+async def aiter_stream_text(stream) -> AsyncIterator[str]:
+    """Yield the text deltas of an async streamed chat completion"""
+    async for chunk in stream:
+        if chunk.choices:
+            content = chunk.choices[0].delta.content
+            if content:
+                yield content
+
+
+async def aread_json_stream(stream) -> str:
+    """Async version of read_json_stream"""
+    parser = IncrementalJSONParser()
+    try:
+        async for text in aiter_stream_text(stream):
+            parser.feed(text)
+            if parser.complete:
+                break
+    finally:
+        await stream.close()
+    return parser.text
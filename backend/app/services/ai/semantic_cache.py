@@ -0,0 +1,102 @@
+"""
+Semantic Cache - Reuses AI decisions for inputs that mean the same thing
+
+Second tier behind the exact-match LLM cache: inputs are embedded with a
+small embedding model and compared by cosine similarity, so "add Inception
+movie" and "capture Inception 2010" can share one database selection.
+Entries are namespaced (e.g. per Notion workspace) and kept in process memory.
+"""
+import logging
+import hashlib
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+from app.config import settings
+from app.core import get_async_openai_client
+from app.core.openai_client import OPENAI_SDK_RETRIES
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Entries kept per namespace - oldest are dropped first
+SEMANTIC_CACHE_SIZE = 256
+
+
+async def embed_text(text: str) -> Optional[np.ndarray]:
+    """Unit-length embedding of text, or None if it can't be computed"""
+    client = get_async_openai_client()
+    if not client or not text.strip():
+        return None
+    
+    try:
+        response = await client.with_options(max_retries=OPENAI_SDK_RETRIES).embeddings.create(model=EMBEDDING_MODEL, input=text)
+    except Exception as e:
+        logger.warning("⚠️ Embedding failed: %s", e)
+        return None
+    
+    vector = np.asarray(response.data[0].embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else None
+
+
+def namespace_key(parts: Iterable[str]) -> str:
+    """Stable namespace for a set of identifiers (order-independent)"""
+    return hashlib.sha256("\n".join(sorted(parts)).encode()).hexdigest()
+
+
+class SemanticCache:
+    """Nearest-neighbour lookup over unit embeddings, one matrix per namespace"""
+    
+    def __init__(self, threshold: float, max_size: int):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._namespaces: Dict[str, Tuple[np.ndarray, List[Any]]] = {}
+        self._lock = threading.Lock()
+    
+    def lookup(self, namespace: str, embedding: np.ndarray) -> Optional[Any]:
+        """Value stored for the most similar embedding, if it clears the threshold"""
+        with self._lock:
+            entry = self._namespaces.get(namespace)
+            if entry is not None:
+                matrix, values = entry
+                # Rows are unit length, so the dot product is the cosine similarity
+                scores = matrix @ embedding
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self.hits += 1
+                    return values[best]
+            self.misses += 1
+            return None
+    
+    def add(self, namespace: str, embedding: np.ndarray, value: Any) -> None:
+        with self._lock:
+            entry = self._namespaces.get(namespace)
+            if entry is None:
+                self._namespaces[namespace] = (embedding[np.newaxis, :], [value])
+                return
+            
+            matrix, values = entry
+            matrix = np.vstack((matrix[-(self.max_size - 1):], embedding))
+            values = values[-(self.max_size - 1):] + [value]
+            self._namespaces[namespace] = (matrix, values)
+    
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "namespaces": len(self._namespaces)}
+
+
+_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Get or create the semantic cache (lazy initialization)"""
+    global _cache
+    
+    if _cache is None:
+        _cache = SemanticCache(settings.semantic_cache_threshold, SEMANTIC_CACHE_SIZE)
+    
+    return _cache
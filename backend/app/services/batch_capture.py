@@ -0,0 +1,113 @@
+"""
+Batch Capture Service - Queues non-interactive text captures through the OpenAI Batch API
+
+Captures are analyzed in one batch (half price, up to 24h turnaround); a
+background poller routes the results to Calendar/Notion once the batch completes.
+Pending batches live in process memory only; finished ones are kept for
+BATCH_RESULTS_TTL so clients can fetch their results, then dropped.
+"""
+import asyncio
+import logging
+import uuid
+from typing import Dict, Any, List, Optional
+
+from app.core import get_local_datetime_context
+from app.services.ai.analyzer import build_text_analysis_request, finalize_text_analysis
+from app.services.ai.batch import submit_batch, wait_for_batch
+from app.services.capture import process_capture_result
+
+logger = logging.getLogger(__name__)
+
+# How long a finished batch (routed or failed) stays queryable
+BATCH_RESULTS_TTL = 3600
+
+_batches: Dict[str, Dict[str, Any]] = {}
+
+
+async def queue_text_captures(
+    texts: List[str],
+    notion_api_key: Optional[str] = None,
+    google_tokens: Optional[Dict[str, Any]] = None,
+    selected_page_id: Optional[str] = None
+) -> str:
+    """Submit text captures for batched analysis and start polling. Returns the batch id."""
+    dt_context = get_local_datetime_context()
+    
+    captures = {f"capture-{uuid.uuid4().hex}": text for text in texts}
+    requests = [
+        {"custom_id": custom_id, "body": build_text_analysis_request(text, dt_context)}
+        for custom_id, text in captures.items()
+    ]
+    batch_id = await submit_batch(requests)
+    
+    _batches[batch_id] = {
+        "status": "queued",
+        "captures": captures,
+        "dt_context": dt_context,
+        "credentials": {
+            "notion_api_key": notion_api_key,
+            "google_tokens": google_tokens,
+            "selected_page_id": selected_page_id,
+        },
+        "results": None,
+    }
+    _batches[batch_id]["poller"] = asyncio.create_task(_poll_batch(batch_id))
+    
+    return batch_id
+
+
+def get_queued_batch(batch_id: str) -> Optional[Dict[str, Any]]:
+    """Status (and routed results, once done) of a queued batch"""
+    batch = _batches.get(batch_id)
+    if batch is None:
+        return None
+    
+    return {
+        "batch_id": batch_id,
+        "status": batch["status"],
+        "count": len(batch["captures"]),
+        "results": batch["results"],
+    }
+
+
+async def _poll_batch(batch_id: str):
+    """Wait for a batch to finish, route every capture in it, then expire it after BATCH_RESULTS_TTL"""
+    try:
+        await _route_batch(batch_id)
+    finally:
+        _batches[batch_id].pop("credentials", None)
+        asyncio.get_running_loop().call_later(BATCH_RESULTS_TTL, _batches.pop, batch_id, None)
+
+
+async def _route_batch(batch_id: str):
+    batch = _batches[batch_id]
+    
+    status, outputs = await wait_for_batch(batch_id, on_status=lambda status: batch.update(status=status))
+    if outputs is None:
+        logger.error("❌ Batch %s %s", batch_id, status)
+        batch["status"] = status
+        return
+    
+    logger.info("📦 Batch %s completed, routing %d captures...", batch_id, len(outputs))
+    
+    credentials = batch["credentials"]
+    
+    async def route(custom_id: str, text: str) -> Dict[str, Any]:
+        ai_response_text = outputs.get(custom_id)
+        if ai_response_text is None:
+            return {"status": "error", "message": "AI analysis failed", "input_length": len(text)}
+        
+        analysis = finalize_text_analysis(ai_response_text, text, batch["dt_context"])
+        try:
+            result = await process_capture_result(analysis, "text", background_enrichment=True, bulk=True, **credentials)
+        except Exception as e:
+            result = {"status": "error", "message": str(e)}
+        result["input_type"] = "text"
+        result["input_length"] = len(text)
+        return result
+    
+    # Captures are independent - route them concurrently
+    batch["results"] = list(await asyncio.gather(
+        *(route(custom_id, text) for custom_id, text in batch["captures"].items())
+    ))
+    batch["status"] = "routed"
@@ -0,0 +1,92 @@
+"""
+Batch Enrichment Service - Researches properties of already-created pages through the OpenAI Batch API
+
+Used for background enrichment: the page is created with the user's data
+right away, researchable properties are filled in later (half price, up to
+24h turnaround). Requests arriving within ENRICH_BATCH_WINDOW share one batch.
+Pending enrichments live in process memory only.
+"""
+import asyncio
+import logging
+import uuid
+from typing import Dict, Any, List, Set
+
+from app.services.ai.batch import wait_for_batch
+from app.services.ai.enricher import enrich_properties_batch, parse_enrichment
+from app.services.notion.client import NotionClient
+from app.services.notion.properties import apply_enriched_properties
+
+logger = logging.getLogger(__name__)
+
+# How long to collect enrichments before submitting them as one batch
+ENRICH_BATCH_WINDOW = 30
+
+_pending: Dict[str, Dict[str, Any]] = {}
+_window_open = False
+_tasks: Set[asyncio.Task] = set()  # strong refs so running flushes aren't garbage collected
+
+
+def queue_enrichment(
+    page_id: str,
+    user_data: Dict[str, Any],
+    researchable: List[Dict[str, Any]],
+    properties_schema: Dict[str, Dict[str, Any]],
+    notion_api_key: str
+) -> None:
+    """Schedule researchable properties of a created page to be filled by the next batch"""
+    global _window_open
+    
+    _pending[f"enrich-{uuid.uuid4().hex}"] = {
+        "page_id": page_id,
+        "user_data": user_data,
+        "researchable": researchable,
+        "properties_schema": properties_schema,
+        "notion_api_key": notion_api_key,
+    }
+    
+    if not _window_open:
+        _window_open = True
+        task = asyncio.create_task(_flush_after_window())
+        _tasks.add(task)
+        task.add_done_callback(_tasks.discard)
+
+
+async def _flush_after_window():
+    """Submit everything queued during the window as one batch, then apply the results"""
+    global _window_open
+    
+    await asyncio.sleep(ENRICH_BATCH_WINDOW)
+    
+    items = dict(_pending)
+    _pending.clear()
+    _window_open = False
+    
+    try:
+        batch_id = await enrich_properties_batch({
+            custom_id: (item["user_data"], item["researchable"])
+            for custom_id, item in items.items()
+        })
+    except Exception as e:
+        logger.error("❌ Enrichment batch submit failed: %s", e)
+        return
+    
+    status, outputs = await wait_for_batch(batch_id)
+    if outputs is None:
+        logger.error("❌ Enrichment batch %s %s", batch_id, status)
+        return
+    
+    logger.info("📦 Enrichment batch %s completed, updating %d pages...", batch_id, len(outputs))
+    
+    async def apply(custom_id: str, item: Dict[str, Any]):
+        ai_response = outputs.get(custom_id)
+        enriched = parse_enrichment(ai_response) if ai_response else {}
+        if not enriched:
+            return
+        
+        update = apply_enriched_properties({}, enriched, item["properties_schema"])
+        if update["properties"]:
+            client = NotionClient(item["notion_api_key"])
+            await asyncio.to_thread(client.update_page, item["page_id"], update["properties"])
+    
+    # Pages are independent - update them concurrently
+    await asyncio.gather(*(apply(custom_id, item) for custom_id, item in items.items()))
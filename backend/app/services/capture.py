@@ -2,38 +2,354 @@
 Capture Orchestration Service - Coordinates the full capture flow
 Stateless - receives credentials per request
 """
-from datetime import datetime
-from typing import Dict, Any, Optional
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional
 
+from app.core import get_local_datetime_context
 from app.services import ai
-from app.services.ai.analyzer import process_capture
 from app.services.notion.client import NotionClient, get_auth_status as notion_auth_status
-from app.services.notion.databases import fetch_databases, fetch_database_properties, detect_log_database, write_log_entry
+from app.services.notion.databases import fetch_databases, fetch_database_properties, invalidate_database_properties, detect_log_database
 from app.services.notion.properties import apply_enriched_properties
+from app.services.batch_enrichment import queue_enrichment
+from app.services.log_queue import queue_log_entry
 from app.services.google.auth import get_auth_status as google_auth_status
 from app.services.google.calendar import create_calendar_event
 
+logger = logging.getLogger(__name__)
 
-def process_capture_result(
+
+def _format_props(props: List[Dict[str, Any]], value_limit: Optional[int] = None) -> str:
+    """Render filled properties as 'Name=value, ...' for log details"""
+    if not props:
+        return "None"
+    if value_limit is None:
+        return ", ".join(f"{p['property']}={p['value']}" for p in props)
+    return ", ".join(f"{p['property']}={p.get('value', '')[:value_limit]}" for p in props)
+
+
+def _build_success_log_details(raw_input: str, summary: Dict[str, Any], db_title: str) -> str:
+    """Build the log details string for a successfully created page"""
+    return (
+        f"SUCCESS. Raw input: '{raw_input}'. "
+        f"Database: {db_title}. "
+        f"Mapped: {_format_props(summary.get('filled_from_user', []), value_limit=30)}. "
+        f"AI-researched: {_format_props(summary.get('filled_by_ai', []))}."
+    )
+
+
+def _build_failure_log_details(raw_input: str, reason: str, context: str, error: str) -> str:
+    """Build the log details string for a failed capture"""
+    return (
+        f"FAILURE: {reason}. "
+        f"Raw input: '{raw_input}'. "
+        f"{context}. "
+        f"{error}"
+    )
+
+
+async def _route_to_calendar(
     analysis: Dict[str, Any],
-    source_type: str,
+    summary: Dict[str, Any],
+    result: Dict[str, Any],
+    notion_api_key: Optional[str] = None,
+    google_tokens: Optional[Dict[str, Any]] = None,
+    selected_page_id: Optional[str] = None,
+    databases: Optional[List[Dict[str, Any]]] = None,
+    background_enrichment: bool = False,
+    bulk: bool = False
+) -> None:
+    """Route an event to Google Calendar, recording the outcome in result/summary"""
+    title = result["title"]
+    start_time = analysis.get("start_time")
+    end_time = analysis.get("end_time")
+    location = analysis.get("location")
+    
+    logger.info("📅 Routing to Google Calendar: %s", title)
+    summary["destination"] = "Google Calendar"
+    
+    if not google_tokens:
+        result["calendar_event_created"] = False
+        result["calendar_error"] = "Google Calendar not connected. Please connect in settings."
+        return
+    
+    # Sync to Google Calendar
+    event_data = {
+        "category": "event",
+        "title": title,
+        "description": analysis.get("description"),
+        "start_time": start_time,
+        "end_time": end_time,
+        "location": location,
+    }
+    sync_result = await create_calendar_event(google_tokens, event_data)
+    
+    if not sync_result.get("success"):
+        result["calendar_event_created"] = False
+        result["calendar_error"] = sync_result.get("error", "Unknown error")
+        logger.error("❌ Failed to create event: %s", sync_result.get("error"))
+        return
+    
+    result["calendar_event_created"] = True
+    result["event_info"] = {
+        "title": title,
+        "calendar_event_id": sync_result.get("calendar_event_id"),
+        "calendar_link": sync_result.get("calendar_link"),
+        "start_time": start_time,
+        "end_time": end_time,
+        "location": location,
+    }
+    
+    summary["filled_from_user"] = [
+        {"field": "title", "value": title},
+        {"field": "start_time", "value": start_time},
+    ]
+    if end_time:
+        summary["filled_from_user"].append({"field": "end_time", "value": end_time})
+    if location:
+        summary["filled_from_user"].append({"field": "location", "value": location})
+    
+    logger.info("✅ Event created in Google Calendar")
+
+
+def _log_database_schema(databases: List[Dict[str, Any]], log_db_id: str) -> Optional[Dict[str, Any]]:
+    """Properties of the log database from the fetched database list (None if absent)"""
+    return next((db.get("properties") for db in databases if db.get("id") == log_db_id), None)
+
+
+async def _route_to_notion(
+    analysis: Dict[str, Any],
+    summary: Dict[str, Any],
+    result: Dict[str, Any],
+    notion_api_key: Optional[str] = None,
+    google_tokens: Optional[Dict[str, Any]] = None,
+    selected_page_id: Optional[str] = None,
+    databases: Optional[List[Dict[str, Any]]] = None,
+    background_enrichment: bool = False,
+    bulk: bool = False
+) -> None:
+    """Route content to the best-matching Notion database, recording the outcome in result/summary"""
+    title = result["title"]
+    raw_input = analysis.get("raw_input", "")
+    
+    logger.info("📓 Routing to Notion: %s", title)
+    summary["destination"] = "Notion"
+    
+    # Check Notion connection
+    if not notion_api_key:
+        result["notion_created"] = False
+        result["notion_error"] = "Notion not connected. Please add your API key in settings."
+        summary["left_empty"].append({"reason": "Notion not connected"})
+        return
+    
+    # Get databases (may already be prefetched alongside AI analysis)
+    if databases is None:
+        databases = await asyncio.to_thread(fetch_databases, notion_api_key, selected_page_id)
+    
+    if not databases:
+        result["notion_created"] = False
+        result["notion_error"] = "No Notion databases found. Please share databases with your integration."
+        return
+    
+    # Select best database using AI
+    db_selection = await ai.select_best_database(analysis, databases)
+    
+    if not db_selection.get("success"):
+        # AI couldn't find a fitting database
+        result["notion_created"] = False
+        result["notion_error"] = f"No suitable database found: {db_selection.get('reason', 'Unknown reason')}"
+        summary["database_selection_failed"] = True
+        summary["database_selection_reason"] = db_selection.get("reason", "Unknown")
+        
+        # Write failure to Notion log database
+        log_db_id = detect_log_database(databases)
+        if log_db_id:
+            failure_details = _build_failure_log_details(
+                raw_input,
+                "No suitable database",
+                "Available DBs: " + ", ".join(db.get("title", "Untitled") for db in databases),
+                f"Reason: {db_selection.get('reason', 'Unknown')}"
+            )
+            log_data = {
+                "action": f"FAILED: {title}",
+                "timestamp": get_local_datetime_context()["datetime_iso"],
+                "result": "Failed",
+                "database": "None (no match)",
+                "details": failure_details
+            }
+            queue_log_entry(notion_api_key, log_db_id, log_data, _log_database_schema(databases, log_db_id))
+            logger.info("📝 Failure queued for the Notion log")
+        
+        logger.error("❌ Database selection failed: %s", db_selection.get("reason"))
+        return
+    
+    selected_db = db_selection["database"]
+    db_id = selected_db["id"]
+    db_title = selected_db.get("title", "Unknown")
+    summary["database"] = db_title
+    summary["database_selection_reason"] = db_selection.get("reason", "")
+    summary["database_selection_confidence"] = db_selection.get("confidence", 0.0)
+    
+    logger.info("📚 Selected database: %s (confidence: %.2f)", db_title, db_selection.get("confidence", 0))
+    
+    # Fetch database properties
+    properties = await asyncio.to_thread(fetch_database_properties, notion_api_key, db_id)
+    
+    # DYNAMIC AI PROPERTY MAPPING + RESEARCHABLE IDENTIFICATION (one call)
+    logger.info("🤖 AI mapping properties dynamically...")
+    mapping_result = await ai.analyze_properties(analysis, properties, batched=bulk)
+    mapped_properties = mapping_result["properties"]
+    summary["filled_from_user"] = mapping_result["filled_from_user"]
+    summary["left_empty"] = mapping_result["left_empty"]
+    summary["mapping_reasoning"] = mapping_result.get("ai_reasoning", "")
+    researchable = mapping_result["researchable"]
+    
+    logger.info("📝 Mapped %d properties", len(mapped_properties))
+    
+    # AI enrichment for researchable properties (deferred to a batch until the page exists)
+    if researchable and not background_enrichment:
+        logger.info("🔬 Enriching %d researchable properties with AI...", len(researchable))
+        enriched_data = await ai.enrich_properties(analysis, researchable)
+        
+        if enriched_data:
+            enrich_result = apply_enriched_properties(
+                mapped_properties,
+                enriched_data,
+                properties
+            )
+            mapped_properties = enrich_result["properties"]
+            summary["filled_by_ai"] = enrich_result["filled_by_ai"]
+            
+            # Update left_empty to remove AI-filled properties
+            ai_filled_names = [p["property"] for p in summary["filled_by_ai"]]
+            summary["left_empty"] = [
+                p for p in summary["left_empty"]
+                if p.get("property") not in ai_filled_names
+            ]
+    
+    # Create Notion page
+    client = NotionClient(notion_api_key)
+    create_result = await asyncio.to_thread(client.create_page, db_id, mapped_properties)
+    
+    if create_result.get("success"):
+        result["notion_created"] = True
+        result["notion_info"] = {
+            "page_id": create_result.get("page_id"),
+            "page_url": create_result.get("page_url"),
+            "database": db_title
+        }
+        
+        logger.info("✅ Page created in Notion database: %s", db_title)
+        
+        if researchable and background_enrichment:
+            queue_enrichment(create_result["page_id"], analysis, researchable, properties, notion_api_key)
+            summary["assumptions"].append(f"{len(researchable)} researchable properties queued for background enrichment")
+        
+        # Write to log database if exists
+        log_db_id = detect_log_database(databases)
+        if log_db_id:
+            log_data = {
+                "action": f"Created: {title}",
+                "timestamp": get_local_datetime_context()["datetime_iso"],
+                "result": "Success",
+                "database": db_title,
+                "details": _build_success_log_details(raw_input, summary, db_title)
+            }
+            queue_log_entry(notion_api_key, log_db_id, log_data, _log_database_schema(databases, log_db_id))
+            logger.info("📝 Log entry queued for Notion")
+    else:
+        result["notion_created"] = False
+        result["notion_error"] = create_result.get("error", "Unknown error")
+        
+        # The schema may have changed since it was cached - refetch it next time
+        invalidate_database_properties(notion_api_key, db_id)
+        
+        # Write failure to Notion log database
+        log_db_id = detect_log_database(databases)
+        if log_db_id:
+            failure_details = _build_failure_log_details(
+                raw_input,
+                "Page creation error",
+                f"Database: {db_title}",
+                f"Error: {create_result.get('error', '')}"
+            )
+            log_data = {
+                "action": f"FAILED: {title}",
+                "timestamp": get_local_datetime_context()["datetime_iso"],
+                "result": "Failed",
+                "database": db_title,
+                "details": failure_details
+            }
+            queue_log_entry(notion_api_key, log_db_id, log_data, _log_database_schema(databases, log_db_id))
+            logger.info("📝 Failure queued for the Notion log")
+        
+        logger.error("❌ Failed to create Notion page: %s", create_result.get("error"))
+
+
+# Category → route handler. Anything that isn't an event goes to Notion.
+_ROUTES = {
+    "event": _route_to_calendar,
+}
+
+
+async def prefetch_destination_context(
     notion_api_key: Optional[str] = None,
     google_tokens: Optional[Dict[str, Any]] = None,
     selected_page_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Fetch the routing context that doesn't depend on the AI result
+    (auth statuses, Notion databases) concurrently.
+    
+    Meant to run alongside AI analysis so the metadata is ready when it returns.
+    Returns keyword arguments for process_capture_result.
+    """
+    calls = [
+        asyncio.to_thread(notion_auth_status, notion_api_key),
+        asyncio.to_thread(google_auth_status, google_tokens),
+    ]
+    if notion_api_key:
+        calls.append(asyncio.to_thread(fetch_databases, notion_api_key, selected_page_id))
+    
+    notion_status, google_status, *databases = await asyncio.gather(*calls)
+    
+    return {
+        "notion_status": notion_status,
+        "google_status": google_status,
+        "databases": databases[0] if databases else None,
+    }
+
+
+async def process_capture_result(
+    analysis: Dict[str, Any],
+    source_type: str,
+    notion_api_key: Optional[str] = None,
+    google_tokens: Optional[Dict[str, Any]] = None,
+    selected_page_id: Optional[str] = None,
+    databases: Optional[List[Dict[str, Any]]] = None,
+    notion_status: Optional[Dict[str, Any]] = None,
+    google_status: Optional[Dict[str, Any]] = None,
+    background_enrichment: bool = False,
+    bulk: bool = False
 ) -> Dict[str, Any]:
     """
     Process AI analysis result and route to appropriate destination.
     Stateless - credentials passed per request.
     
+    databases / notion_status / google_status can be passed in when already
+    prefetched (see prefetch_destination_context); otherwise they are fetched here.
+    background_enrichment creates the Notion page without researched properties
+    and fills them in later through the OpenAI Batch API. bulk marks
+    non-interactive captures, whose AI calls may wait to be combined.
+    
     Returns full response with summary of what happened.
     """
     category = analysis.get("category", "other")
-    title = analysis.get("title", "Untitled")
     
     result = {
         "status": "success",
         "category": category,
-        "title": title,
+        "title": analysis.get("title", "Untitled"),
         "source_type": source_type,
         "ai_confidence": analysis.get("ai_confidence", 0),
     }
@@ -48,226 +364,26 @@ def process_capture_result(
         "assumptions": []
     }
     
-    if category == "event":
-        # ==========================================
-        # ROUTE TO GOOGLE CALENDAR
-        # ==========================================
-        print(f"📅 Routing to Google Calendar: {title}", flush=True)
-        summary["destination"] = "Google Calendar"
-        
-        # Prepare event data
-        event_data = {
-            "category": "event",
-            "title": title,
-            "description": analysis.get("description"),
-            "start_time": analysis.get("start_time"),
-            "end_time": analysis.get("end_time"),
-            "location": analysis.get("location"),
-        }
-        
-        if not google_tokens:
-            result["calendar_event_created"] = False
-            result["calendar_error"] = "Google Calendar not connected. Please connect in settings."
-        else:
-            # Sync to Google Calendar
-            sync_result = create_calendar_event(google_tokens, event_data)
-            
-            if sync_result.get("success"):
-                result["calendar_event_created"] = True
-                result["event_info"] = {
-                    "title": title,
-                    "calendar_event_id": sync_result.get("calendar_event_id"),
-                    "calendar_link": sync_result.get("calendar_link"),
-                    "start_time": analysis.get("start_time"),
-                    "end_time": analysis.get("end_time"),
-                    "location": analysis.get("location"),
-                }
-                
-                summary["filled_from_user"] = [
-                    {"field": "title", "value": title},
-                    {"field": "start_time", "value": analysis.get("start_time")},
-                ]
-                if analysis.get("end_time"):
-                    summary["filled_from_user"].append({"field": "end_time", "value": analysis.get("end_time")})
-                if analysis.get("location"):
-                    summary["filled_from_user"].append({"field": "location", "value": analysis.get("location")})
-                
-                print(f"✅ Event created in Google Calendar", flush=True)
-            else:
-                result["calendar_event_created"] = False
-                result["calendar_error"] = sync_result.get("error", "Unknown error")
-                print(f"❌ Failed to create event: {sync_result.get('error')}", flush=True)
-    
-    else:
-        # ==========================================
-        # ROUTE TO NOTION
-        # ==========================================
-        print(f"📓 Routing to Notion: {title}", flush=True)
-        summary["destination"] = "Notion"
-        
-        # Check Notion connection
-        if not notion_api_key:
-            result["notion_created"] = False
-            result["notion_error"] = "Notion not connected. Please add your API key in settings."
-            summary["left_empty"].append({"reason": "Notion not connected"})
-        else:
-            # Get databases
-            databases = fetch_databases(notion_api_key, selected_page_id)
-            
-            if not databases:
-                result["notion_created"] = False
-                result["notion_error"] = "No Notion databases found. Please share databases with your integration."
-            else:
-                # Select best database using AI
-                db_selection = ai.select_best_database(analysis, databases)
-                
-                # Get log database early for writing failures too
-                log_db_id = detect_log_database(databases)
-                
-                if not db_selection.get("success"):
-                    # AI couldn't find a fitting database
-                    result["notion_created"] = False
-                    result["notion_error"] = f"No suitable database found: {db_selection.get('reason', 'Unknown reason')}"
-                    summary["database_selection_failed"] = True
-                    summary["database_selection_reason"] = db_selection.get("reason", "Unknown")
-                    
-                    # Detailed log entry
-                    db_names = [db.get("title", "Untitled") for db in databases]
-                    failure_details = (
-                        f"FAILURE: No suitable database. "
-                        f"Raw input: '{analysis.get('raw_input', '')}'. "
-                        f"Available DBs: {', '.join(db_names)}. "
-                        f"Reason: {db_selection.get('reason', 'Unknown')}"
-                    )
-                    
-                    # Write failure to Notion log database
-                    if log_db_id:
-                        log_data = {
-                            "action": f"FAILED: {title}",
-                            "timestamp": datetime.now().astimezone().isoformat(),
-                            "result": "Failed",
-                            "database": "None (no match)",
-                            "details": failure_details
-                        }
-                        write_log_entry(notion_api_key, log_db_id, log_data)
-                        print(f"📝 Failure logged to Notion", flush=True)
-                    
-                    print(f"❌ Database selection failed: {db_selection.get('reason')}", flush=True)
-                else:
-                    selected_db = db_selection["database"]
-                    db_id = selected_db["id"]
-                    db_title = selected_db.get("title", "Unknown")
-                    summary["database"] = db_title
-                    summary["database_selection_reason"] = db_selection.get("reason", "")
-                    summary["database_selection_confidence"] = db_selection.get("confidence", 0.0)
-                    
-                    print(f"📚 Selected database: {db_title} (confidence: {db_selection.get('confidence', 0):.2f})", flush=True)
-                    
-                    # Fetch database properties
-                    properties = fetch_database_properties(notion_api_key, db_id)
-                    
-                    # DYNAMIC AI PROPERTY MAPPING
-                    print(f"🤖 AI mapping properties dynamically...", flush=True)
-                    mapping_result = ai.map_properties_dynamically(analysis, properties)
-                    mapped_properties = mapping_result["properties"]
-                    summary["filled_from_user"] = mapping_result["filled_from_user"]
-                    summary["left_empty"] = mapping_result["left_empty"]
-                    summary["mapping_reasoning"] = mapping_result.get("ai_reasoning", "")
-                    
-                    print(f"📝 Mapped {len(mapped_properties)} properties", flush=True)
-                    
-                    # DYNAMIC AI RESEARCHABLE IDENTIFICATION
-                    if mapping_result["left_empty"]:
-                        print(f"🔍 AI identifying researchable properties...", flush=True)
-                        researchable = ai.identify_researchable_properties(
-                            analysis, properties, mapping_result["left_empty"]
-                        )
-                        
-                        # AI enrichment for researchable properties
-                        if researchable:
-                            print(f"🔬 Enriching {len(researchable)} researchable properties with AI...", flush=True)
-                            enriched_data = ai.enrich_properties(analysis, researchable)
-                            
-                            if enriched_data:
-                                enrich_result = apply_enriched_properties(
-                                    mapped_properties,
-                                    enriched_data,
-                                    properties
-                                )
-                                mapped_properties = enrich_result["properties"]
-                                summary["filled_by_ai"] = enrich_result["filled_by_ai"]
-                                
-                                # Update left_empty to remove AI-filled properties
-                                ai_filled_names = [p["property"] for p in summary["filled_by_ai"]]
-                                summary["left_empty"] = [
-                                    p for p in summary["left_empty"]
-                                    if p.get("property") not in ai_filled_names
-                                ]
-                    
-                    # Create Notion page
-                    client = NotionClient(notion_api_key)
-                    create_result = client.create_page(db_id, mapped_properties)
-                    
-                    if create_result.get("success"):
-                        result["notion_created"] = True
-                        result["notion_info"] = {
-                            "page_id": create_result.get("page_id"),
-                            "page_url": create_result.get("page_url"),
-                            "database": db_title
-                        }
-                        
-                        # Build detailed log description
-                        filled_props = [f"{p['property']}={p.get('value', '')[:30]}" for p in summary.get("filled_from_user", [])]
-                        ai_props = [f"{p['property']}={p['value']}" for p in summary.get("filled_by_ai", [])]
-                        log_details = (
-                            f"SUCCESS. Raw input: '{analysis.get('raw_input', '')}'. "
-                            f"Database: {db_title}. "
-                            f"Mapped: {', '.join(filled_props) if filled_props else 'None'}. "
-                            f"AI-researched: {', '.join(ai_props) if ai_props else 'None'}."
-                        )
-                        
-                        print(f"✅ Page created in Notion database: {db_title}", flush=True)
-                        
-                        # Write to log database if exists
-                        if log_db_id:
-                            log_data = {
-                                "action": f"Created: {title}",
-                                "timestamp": datetime.now().astimezone().isoformat(),
-                                "result": "Success",
-                                "database": db_title,
-                                "details": log_details
-                            }
-                            write_log_entry(notion_api_key, log_db_id, log_data)
-                            print(f"📝 Log entry written to Notion", flush=True)
-                    else:
-                        result["notion_created"] = False
-                        result["notion_error"] = create_result.get("error", "Unknown error")
-                        
-                        failure_details = (
-                            f"FAILURE: Page creation error. "
-                            f"Raw input: '{analysis.get('raw_input', '')}'. "
-                            f"Database: {db_title}. "
-                            f"Error: {create_result.get('error', '')}"
-                        )
-                        
-                        # Write failure to Notion log database
-                        if log_db_id:
-                            log_data = {
-                                "action": f"FAILED: {title}",
-                                "timestamp": datetime.now().astimezone().isoformat(),
-                                "result": "Failed",
-                                "database": db_title,
-                                "details": failure_details
-                            }
-                            write_log_entry(notion_api_key, log_db_id, log_data)
-                            print(f"📝 Failure logged to Notion", flush=True)
-                        
-                        print(f"❌ Failed to create Notion page: {create_result.get('error')}", flush=True)
+    route = _ROUTES.get(category, _route_to_notion)
+    await route(
+        analysis,
+        summary,
+        result,
+        notion_api_key=notion_api_key,
+        google_tokens=google_tokens,
+        selected_page_id=selected_page_id,
+        databases=databases,
+        background_enrichment=background_enrichment,
+        bulk=bulk
+    )
     
     # Add summary and auth status to result
     result["summary"] = summary
-    result["google_status"] = google_auth_status(google_tokens)
-    result["notion_status"] = notion_auth_status(notion_api_key)
+    if google_status is None:
+        google_status = await asyncio.to_thread(google_auth_status, google_tokens)
+    if notion_status is None:
+        notion_status = await asyncio.to_thread(notion_auth_status, notion_api_key)
+    result["google_status"] = google_status
+    result["notion_status"] = notion_status
     
     return result
-
@@ -4,9 +4,12 @@ Tokens are managed by the frontend, backend just processes them
 """
 import os
 import json
+import logging
+import hashlib
 import secrets
+import threading
 from typing import Dict, Any, Optional
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request as GoogleRequest
@@ -15,9 +18,19 @@ from googleapiclient.discovery import build
 
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 # OAuth configuration
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
+# Credentials built (and refreshed) from frontend tokens are reused until shortly
+# before they expire, so a stale access token isn't refreshed on every request
+CREDENTIALS_EXPIRY_MARGIN = timedelta(seconds=60)
+CREDENTIALS_CACHE_SIZE = 1000
+
+_credentials_cache: Dict[str, Credentials] = {}
+_credentials_lock = threading.Lock()
+
 
 def _get_client_config() -> Optional[Dict[str, Any]]:
     """Get Google OAuth client configuration"""
@@ -97,7 +110,7 @@ def exchange_code_for_tokens(code: str, state: str) -> Optional[Dict[str, Any]]:
             "scopes": list(credentials.scopes) if credentials.scopes else SCOPES
         }
     except Exception as e:
-        print(f"Token exchange error: {e}")
+        logger.error("Token exchange error: %s", e)
         return None
 
 
@@ -131,19 +144,42 @@ def refresh_access_token(
             "expiry": credentials.expiry.isoformat() if credentials.expiry else None
         }
     except Exception as e:
-        print(f"Token refresh error: {e}")
+        logger.error("Token refresh error: %s", e)
         return None
 
 
+def _credentials_cache_key(tokens: Dict[str, Any]) -> str:
+    secret = tokens.get("refresh_token") or tokens["access_token"]
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+def _is_fresh(credentials: Credentials) -> bool:
+    """Valid and not about to expire"""
+    if credentials.expiry is None:
+        return credentials.valid
+    expiry = credentials.expiry
+    if expiry.tzinfo is None:
+        expiry = expiry.replace(tzinfo=timezone.utc)
+    return expiry - CREDENTIALS_EXPIRY_MARGIN > datetime.now(timezone.utc)
+
+
 def build_credentials_from_tokens(tokens: Dict[str, Any]) -> Optional[Credentials]:
-    """Build Credentials object from token dictionary"""
+    """Build Credentials object from token dictionary (cached in memory until near expiry)"""
     if not tokens or not tokens.get("access_token"):
         return None
     
+    cache_key = _credentials_cache_key(tokens)
+    cached = _credentials_cache.get(cache_key)
+    if cached is not None and _is_fresh(cached):
+        return cached
+    
     try:
         expiry = None
         if tokens.get("expiry"):
             expiry = datetime.fromisoformat(tokens["expiry"].replace("Z", "+00:00"))
+            # google-auth compares expiry against naive UTC
+            if expiry.tzinfo is not None:
+                expiry = expiry.astimezone(timezone.utc).replace(tzinfo=None)
         
         credentials = Credentials(
             token=tokens["access_token"],
@@ -158,10 +194,17 @@ def build_credentials_from_tokens(tokens: Dict[str, Any]) -> Optional[Credential
         if credentials.expired and credentials.refresh_token:
             credentials.refresh(GoogleRequest())
         
-        return credentials if credentials.valid else None
+        if not credentials.valid:
+            return None
+        
+        with _credentials_lock:
+            if len(_credentials_cache) >= CREDENTIALS_CACHE_SIZE:
+                _credentials_cache.pop(next(iter(_credentials_cache)))
+            _credentials_cache[cache_key] = credentials
+        return credentials
         
     except Exception as e:
-        print(f"Build credentials error: {e}")
+        logger.error("Build credentials error: %s", e)
         return None
 
 
@@ -197,7 +240,7 @@ def get_auth_status(tokens: Optional[Dict[str, Any]]) -> Dict[str, Any]:
             if '@' in str(calendar_id):
                 email = calendar_id
     except Exception as e:
-        print(f"Error getting Google user info: {e}")
+        logger.error("Error getting Google user info: %s", e)
     
     return {
         "connected": True,
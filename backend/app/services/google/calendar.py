@@ -1,36 +1,46 @@
 """
 Google Calendar operations - Stateless
+
+Talks to the Calendar REST API directly over the shared async HTTP client;
+googleapiclient's discovery build() and blocking execute() are skipped.
 """
-from datetime import datetime, timedelta, timezone
+import logging
+import asyncio
+from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
+from zoneinfo import ZoneInfo
 
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+from tzlocal import get_localzone_name
 
 from .auth import build_credentials_from_tokens
 from app.core.datetime_utils import parse_datetime_string
+from app.core.http_client import get_async_http_client
 
+logger = logging.getLogger(__name__)
+
+CALENDAR_EVENTS_URL = "https://www.googleapis.com/calendar/v3/calendars/primary/events"
+
+# Server timezone as an IANA name (what the Calendar API expects), resolved once
+LOCAL_TZ_NAME = get_localzone_name() or "UTC"
+LOCAL_TZ = ZoneInfo(LOCAL_TZ_NAME)
 
-def _get_timezone_name(local_tz, local_now: datetime) -> str:
-    """Get timezone name for Google Calendar API"""
-    tz_name = str(local_tz)
-    
-    if hasattr(local_tz, 'zone'):
-        tz_name = local_tz.zone
-    elif '+' in tz_name or '-' in tz_name:
-        # Fallback based on offset
-        offset_hours = local_now.utcoffset().total_seconds() / 3600
-        if offset_hours == 0:
-            tz_name = "UTC"
-        elif offset_hours == 1:
-            tz_name = "Europe/Berlin"
-        else:
-            tz_name = "UTC"
-    
-    return tz_name
 
+async def _get_access_token(tokens: Dict[str, Any]) -> Optional[str]:
+    """Valid bearer token for the tokens (an expired one is refreshed off the event loop)"""
+    credentials = await asyncio.to_thread(build_credentials_from_tokens, tokens)
+    if not credentials or not credentials.valid:
+        return None
+    return credentials.token
+
+
+def _api_error(response) -> str:
+    try:
+        return response.json().get("error", {}).get("message", response.text)
+    except ValueError:
+        return response.text
 
-def create_calendar_event(
+
+async def create_calendar_event(
     tokens: Dict[str, Any],
     event_data: Dict[str, Any]
 ) -> Dict[str, Any]:
@@ -43,8 +53,8 @@ def create_calendar_event(
     
     Returns: {success, calendar_event_id, calendar_link, error}
     """
-    credentials = build_credentials_from_tokens(tokens)
-    if not credentials or not credentials.valid:
+    access_token = await _get_access_token(tokens)
+    if not access_token:
         return {
             "success": False,
             "error": "Google Calendar not connected or credentials invalid"
@@ -58,58 +68,53 @@ def create_calendar_event(
         }
     
     try:
-        service = build('calendar', 'v3', credentials=credentials)
-        
         # Parse dates
         start_time = event_data.get("start_date") or event_data.get("start_time")
         end_time = event_data.get("end_date") or event_data.get("end_time")
         
-        # Get local timezone
-        local_now = datetime.now().astimezone()
-        local_tz = local_now.tzinfo
-        
-        # Parse datetime strings
-        start_dt = parse_datetime_string(start_time, local_tz)
-        end_dt = parse_datetime_string(end_time, local_tz)
+        # Parse datetime strings (always tz-aware: naive times are taken as local)
+        start_dt = parse_datetime_string(start_time, LOCAL_TZ)
+        end_dt = parse_datetime_string(end_time, LOCAL_TZ)
         
         # Default times if not provided
         if not start_dt:
-            start_dt = local_now.replace(hour=9, minute=0, second=0, microsecond=0)
+            start_dt = datetime.now(LOCAL_TZ).replace(hour=9, minute=0, second=0, microsecond=0)
         if not end_dt:
             end_dt = start_dt + timedelta(hours=1)
         
-        # Convert to UTC for Google Calendar API
-        start_utc = start_dt.astimezone(timezone.utc)
-        end_utc = end_dt.astimezone(timezone.utc)
-        
-        # Get timezone name
-        tz_name = _get_timezone_name(local_tz, local_now)
-        
         # Build event object
         event = {
             'summary': event_data.get("title", "Untitled Event"),
             'description': event_data.get("description", ""),
             'start': {
-                'dateTime': start_utc.isoformat().replace('+00:00', 'Z'),
-                'timeZone': tz_name,
+                'dateTime': start_dt.isoformat(),
+                'timeZone': LOCAL_TZ_NAME,
             },
             'end': {
-                'dateTime': end_utc.isoformat().replace('+00:00', 'Z'),
-                'timeZone': tz_name,
+                'dateTime': end_dt.isoformat(),
+                'timeZone': LOCAL_TZ_NAME,
             },
         }
         
         if event_data.get("location"):
             event['location'] = event_data["location"]
         
-        print(f"📅 Creating Google Calendar event: {event['summary']}")
-        print(f"   Start: {start_dt.isoformat()}")
-        print(f"   End: {end_dt.isoformat()}")
+        logger.info("📅 Creating Google Calendar event: %s", event['summary'])
+        logger.debug("   Start: %s / End: %s", start_dt, end_dt)
         
         # Create the event
-        created_event = service.events().insert(calendarId='primary', body=event).execute()
+        response = await get_async_http_client().post(
+            CALENDAR_EVENTS_URL,
+            headers={"Authorization": f"Bearer {access_token}"},
+            json=event
+        )
+        if response.status_code != 200:
+            error_msg = f"Google Calendar API Error: {response.status_code} {_api_error(response)}"
+            logger.error("❌ %s", error_msg)
+            return {"success": False, "error": error_msg}
         
-        print(f"✅ Google Calendar event created: {created_event.get('id')}")
+        created_event = response.json()
+        logger.info("✅ Google Calendar event created: %s", created_event.get('id'))
         
         return {
             "success": True,
@@ -119,37 +124,35 @@ def create_calendar_event(
             "event_end": str(created_event.get('end')),
         }
         
-    except HttpError as e:
-        error_msg = f"Google Calendar API Error: {e.resp.status}"
-        print(f"❌ {error_msg}")
-        return {"success": False, "error": error_msg}
     except Exception as e:
         error_msg = f"Error creating calendar event: {str(e)}"
-        print(f"❌ {error_msg}")
+        logger.error("❌ %s", error_msg)
         return {"success": False, "error": error_msg}
 
 
-def delete_calendar_event(
+async def delete_calendar_event(
     tokens: Dict[str, Any],
     event_id: str
 ) -> Dict[str, Any]:
     """Delete a Google Calendar event"""
-    credentials = build_credentials_from_tokens(tokens)
-    if not credentials or not credentials.valid:
+    access_token = await _get_access_token(tokens)
+    if not access_token:
         return {
             "success": False,
             "error": "Google Calendar not connected"
         }
     
     try:
-        service = build('calendar', 'v3', credentials=credentials)
-        service.events().delete(calendarId='primary', eventId=event_id).execute()
+        response = await get_async_http_client().delete(
+            f"{CALENDAR_EVENTS_URL}/{event_id}",
+            headers={"Authorization": f"Bearer {access_token}"}
+        )
+        if response.status_code not in (200, 204):
+            return {"success": False, "error": f"API Error: {response.status_code}"}
         
-        print(f"✅ Deleted Google Calendar event: {event_id}")
+        logger.info("✅ Deleted Google Calendar event: %s", event_id)
         return {"success": True, "event_id": event_id}
         
-    except HttpError as e:
-        return {"success": False, "error": f"API Error: {e.resp.status}"}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
@@ -0,0 +1,103 @@
+"""
+Log Queue - Writes Notion log entries in the background
+
+Capture no longer waits on the log database: entries are queued and written
+together once LOG_FLUSH_WINDOW has passed (or LOG_FLUSH_MAX are waiting), each
+log database's entries through one NotionClient.create_pages call.
+Queued entries live in process memory; flush_log_entries drains them on shutdown.
+"""
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from app.services.notion.databases import write_log_entries
+
+logger = logging.getLogger(__name__)
+
+# How long to collect log entries before writing them
+LOG_FLUSH_WINDOW = 0.5
+
+# Write immediately once this many entries are waiting
+LOG_FLUSH_MAX = 20
+
+_pending: List[Dict[str, Any]] = []
+_window_open = False
+_tasks: Set[asyncio.Task] = set()  # strong refs so running flushes aren't garbage collected
+
+
+def queue_log_entry(
+    notion_api_key: str,
+    log_database_id: str,
+    log_data: Dict[str, Any],
+    properties: Optional[Dict[str, Dict[str, Any]]] = None
+) -> None:
+    """Schedule a log entry to be written by the next flush"""
+    global _window_open
+    
+    _pending.append({
+        "notion_api_key": notion_api_key,
+        "log_database_id": log_database_id,
+        "log_data": log_data,
+        "properties": properties,
+    })
+    
+    if len(_pending) >= LOG_FLUSH_MAX:
+        _spawn(_flush())
+    elif not _window_open:
+        _window_open = True
+        _spawn(_flush_after_window())
+
+
+def _spawn(coro) -> None:
+    task = asyncio.create_task(coro)
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def _flush_after_window():
+    global _window_open
+    
+    await asyncio.sleep(LOG_FLUSH_WINDOW)
+    _window_open = False
+    await _flush()
+
+
+async def _flush():
+    """Write everything queued so far - one bulk create per integration and log database"""
+    items = list(_pending)
+    _pending.clear()
+    if not items:
+        return
+    
+    groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    for item in items:
+        groups.setdefault((item["notion_api_key"], item["log_database_id"]), []).append(item)
+    
+    async def write(notion_api_key: str, log_database_id: str, group: List[Dict[str, Any]]) -> int:
+        # Entries without a schema share one cached fetch per log database
+        properties = next((item["properties"] for item in group if item["properties"] is not None), None)
+        try:
+            results = await asyncio.to_thread(
+                write_log_entries,
+                notion_api_key,
+                log_database_id,
+                [item["log_data"] for item in group],
+                properties
+            )
+        except Exception as e:
+            results = [{"success": False, "error": str(e)}] * len(group)
+        
+        failed = [result for result in results if not result.get("success")]
+        for result in failed:
+            logger.error("Notion log entry failed: %s", result.get("error"))
+        return len(results) - len(failed)
+    
+    written = await asyncio.gather(*(write(*key, group) for key, group in groups.items()))
+    logger.info("%d/%d log entries written to Notion", sum(written), len(items))
+
+
+async def flush_log_entries():
+    """Write queued entries now and wait for running flushes (called on app shutdown)"""
+    await _flush()
+    if _tasks:
+        await asyncio.gather(*_tasks, return_exceptions=True)
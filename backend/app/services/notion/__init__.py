@@ -4,7 +4,7 @@ All methods accept API key as parameter - no stored credentials
 """
 from .client import NotionClient
 from .pages import fetch_pages
-from .databases import fetch_databases, fetch_database_properties, detect_log_database
+from .databases import fetch_databases, fetch_database_properties, invalidate_database_properties, detect_log_database
 from .properties import build_property_value, apply_enriched_properties
 
 __all__ = [
@@ -12,6 +12,7 @@ __all__ = [
     "fetch_pages",
     "fetch_databases", 
     "fetch_database_properties",
+    "invalidate_database_properties",
     "detect_log_database",
     "build_property_value",
     "apply_enriched_properties",
@@ -1,36 +1,154 @@
 """
 Notion API Client - Stateless, accepts API key per request
 """
-import requests
-from typing import Dict, Any, Optional, List
+import time
+import random
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, Optional, List, Tuple
 from datetime import datetime
+import httpx
+import orjson
+
+from app.core.http_client import get_http_client
+
+logger = logging.getLogger(__name__)
 
 NOTION_API_VERSION = "2022-06-28"
 NOTION_API_BASE = "https://api.notion.com/v1"
 
+# Rate limits and transient server errors are retried with exponential backoff
+NOTION_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+NOTION_MAX_RETRIES = 3
+NOTION_BACKOFF_FACTOR = 0.3
+
+# Largest page Notion returns per list/search request
+NOTION_PAGE_SIZE = 100
+
+# Short connect timeout so a dead connection fails fast; reads keep the full budget
+NOTION_CONNECT_TIMEOUT = 3.05
+
+# Notion allows an average of 3 requests/s per integration, with short bursts
+NOTION_RATE_LIMIT = 3.0
+NOTION_RATE_BURST = 10
+
+# Concurrent POSTs in create_pages
+NOTION_BULK_CONCURRENCY = 8
+
+
+class _TokenBucket:
+    """Thread-safe token bucket - acquire() blocks until a request may be sent"""
+    
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve a token now; a negative balance is the wait owed by this caller
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+
+# Buckets kept across all users - least recently used are dropped first
+# (an evicted integration just starts again with a full burst)
+NOTION_RATE_BUCKETS_SIZE = 1000
+
+# Token digest -> bucket, so every client for one integration shares its budget
+_buckets: "OrderedDict[str, _TokenBucket]" = OrderedDict()
+_buckets_lock = threading.Lock()
+
+
+def _rate_limiter(api_key: str) -> _TokenBucket:
+    digest = hashlib.sha256(api_key.encode()).hexdigest()
+    with _buckets_lock:
+        bucket = _buckets.get(digest)
+        if bucket is None:
+            bucket = _buckets[digest] = _TokenBucket(NOTION_RATE_LIMIT, NOTION_RATE_BURST)
+            while len(_buckets) > NOTION_RATE_BUCKETS_SIZE:
+                _buckets.popitem(last=False)
+        else:
+            _buckets.move_to_end(digest)
+        return bucket
+
 
 class NotionClient:
     """Stateless Notion API client - requires API key for each operation"""
     
     def __init__(self, api_key: str):
         self.api_key = api_key
+        self.http = get_http_client()
+        self.rate_limiter = _rate_limiter(api_key)
         self.headers = {
             "Authorization": f"Bearer {api_key}",
             "Notion-Version": NOTION_API_VERSION,
             "Content-Type": "application/json"
         }
     
+    def _request(
+        self,
+        method: str,
+        path: str,
+        body: Optional[Dict[str, Any]] = None,
+        timeout: float = 30,
+        headers: Optional[Dict[str, str]] = None
+    ) -> httpx.Response:
+        """Send a request over the shared pool, retrying rate limits, 5xx and connection errors"""
+        # Serialized once, reused across retries
+        content = orjson.dumps(body) if body is not None else None
+        for attempt in range(NOTION_MAX_RETRIES + 1):
+            self.rate_limiter.acquire()
+            try:
+                response = self.http.request(
+                    method,
+                    f"{NOTION_API_BASE}{path}",
+                    headers={**self.headers, **headers} if headers else self.headers,
+                    content=content,
+                    timeout=httpx.Timeout(timeout, connect=NOTION_CONNECT_TIMEOUT)
+                )
+            except httpx.TransportError as e:
+                if attempt == NOTION_MAX_RETRIES:
+                    raise
+                delay = NOTION_BACKOFF_FACTOR * 2 ** attempt
+                logger.warning("Notion %s on %s %s, retrying in %.1fs", type(e).__name__, method, path, delay)
+                time.sleep(delay + random.uniform(0, 0.1))
+                continue
+            
+            if response.status_code not in NOTION_RETRY_STATUSES or attempt == NOTION_MAX_RETRIES:
+                # httpx negotiates gzip/br and decodes transparently
+                logger.debug(
+                    "Notion %s %s: %d bytes on the wire, %d decoded (%s)",
+                    method, path, response.num_bytes_downloaded, len(response.content),
+                    response.headers.get("Content-Encoding", "identity")
+                )
+                return response
+            
+            # Notion sends Retry-After (seconds) with 429s
+            retry_after = response.headers.get("Retry-After")
+            delay = float(retry_after) if retry_after and retry_after.isdigit() else NOTION_BACKOFF_FACTOR * 2 ** attempt
+            logger.warning("Notion %s on %s %s, retrying in %.1fs", response.status_code, method, path, delay)
+            time.sleep(delay + random.uniform(0, 0.1))
+        
+        return response
+    
     def test_connection(self) -> Dict[str, Any]:
         """Test API key validity and get workspace info"""
         try:
-            response = requests.get(
-                f"{NOTION_API_BASE}/users/me",
-                headers=self.headers,
-                timeout=10
-            )
+            response = self._request("GET", "/users/me", timeout=10)
             
             if response.status_code == 200:
-                user_data = response.json()
+                user_data = orjson.loads(response.content)
                 return {
                     "connected": True,
                     "workspace_name": user_data.get("name", "Notion"),
@@ -52,42 +170,60 @@ class NotionClient:
                 "error": str(e)
             }
     
-    def search(self, filter_obj: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Search Notion content"""
+    def iter_search(self, filter_obj: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Search Notion content, following pagination cursors.
+        Yields results one response page at a time, so only one page is held in memory.
+        """
+        body = {**filter_obj, "page_size": NOTION_PAGE_SIZE}
         try:
-            response = requests.post(
-                f"{NOTION_API_BASE}/search",
-                headers=self.headers,
-                json=filter_obj,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                return response.json().get("results", [])
-            else:
-                print(f"Notion search error: {response.text}")
-                return []
+            while True:
+                response = self._request("POST", "/search", body)
+                
+                if response.status_code != 200:
+                    logger.error("Notion search error: %s", response.text)
+                    return
+                
+                data = orjson.loads(response.content)
+                yield from data.get("results", [])
+                if not data.get("has_more") or not data.get("next_cursor"):
+                    return
+                body["start_cursor"] = data["next_cursor"]
         except Exception as e:
-            print(f"Notion search exception: {e}")
-            return []
+            logger.error("Notion search exception: %s", e)
+    
+    def search(self, filter_obj: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Search Notion content, collecting every result"""
+        return list(self.iter_search(filter_obj))
     
     def get_database(self, database_id: str) -> Optional[Dict[str, Any]]:
         """Get database details"""
+        return self.get_database_if_modified(database_id)[0]
+    
+    def get_database_if_modified(
+        self,
+        database_id: str,
+        etag: Optional[str] = None
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Get database details unless they still match etag.
+        Returns (database, etag) - database is None with the same etag on 304,
+        (None, None) on error.
+        """
+        headers = {"If-None-Match": etag} if etag else None
         try:
-            response = requests.get(
-                f"{NOTION_API_BASE}/databases/{database_id}",
-                headers=self.headers,
-                timeout=30
-            )
+            response = self._request("GET", f"/databases/{database_id}", headers=headers)
             
-            if response.status_code == 200:
-                return response.json()
+            if response.status_code == 304:
+                return None, etag
+            elif response.status_code == 200:
+                return orjson.loads(response.content), response.headers.get("ETag")
             else:
-                print(f"Notion database error: {response.text}")
-                return None
+                logger.error("Notion database error: %s", response.text)
+                return None, None
         except Exception as e:
-            print(f"Notion database exception: {e}")
-            return None
+            logger.error("Notion database exception: %s", e)
+            return None, None
     
     def create_page(
         self,
@@ -105,28 +241,55 @@ class NotionClient:
             if content_blocks:
                 body["children"] = content_blocks
             
-            response = requests.post(
-                f"{NOTION_API_BASE}/pages",
-                headers=self.headers,
-                json=body,
-                timeout=30
-            )
+            response = self._request("POST", "/pages", body)
             
             if response.status_code in [200, 201]:
-                page = response.json()
-                print(f"Created Notion page: {page.get('id')}")
+                page = orjson.loads(response.content)
+                logger.info("Created Notion page: %s", page.get("id"))
                 return {
                     "success": True,
                     "page_id": page.get("id"),
                     "page_url": page.get("url")
                 }
             else:
-                error = response.json().get("message", response.text)
-                print(f"Notion create page error: {error}")
+                error = orjson.loads(response.content).get("message", response.text)
+                logger.error("Notion create page error: %s", error)
+                return {"success": False, "error": f"Notion API: {error}"}
+                
+        except Exception as e:
+            logger.error("Notion create page exception: %s", e)
+            return {"success": False, "error": str(e)}
+    
+    def create_pages(
+        self,
+        database_id: str,
+        properties_list: List[Dict[str, Any]],
+        max_concurrent: int = NOTION_BULK_CONCURRENCY
+    ) -> List[Dict[str, Any]]:
+        """
+        Create several pages in a database concurrently.
+        Results are in input order; the shared rate limiter keeps the burst within Notion's limits.
+        """
+        if len(properties_list) <= 1:
+            return [self.create_page(database_id, properties) for properties in properties_list]
+        
+        with ThreadPoolExecutor(max_workers=min(max_concurrent, len(properties_list))) as executor:
+            return list(executor.map(lambda properties: self.create_page(database_id, properties), properties_list))
+    
+    def update_page(self, page_id: str, properties: Dict[str, Any]) -> Dict[str, Any]:
+        """Update properties of an existing page"""
+        try:
+            response = self._request("PATCH", f"/pages/{page_id}", {"properties": properties})
+            
+            if response.status_code == 200:
+                return {"success": True, "page_id": page_id}
+            else:
+                error = orjson.loads(response.content).get("message", response.text)
+                logger.error("Notion update page error: %s", error)
                 return {"success": False, "error": f"Notion API: {error}"}
                 
         except Exception as e:
-            print(f"Notion create page exception: {e}")
+            logger.error("Notion update page exception: %s", e)
             return {"success": False, "error": str(e)}
 
 
@@ -1,16 +1,40 @@
 """
 Notion Database operations
 """
-from typing import List, Dict, Any, Optional
+import re
+import logging
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, List, Dict, Any, Optional, Tuple
 
+from app.core import get_local_datetime_context
 from .client import NotionClient
 
+logger = logging.getLogger(__name__)
+
+# Database schemas change rarely - reuse each one for a few minutes
+SCHEMA_CACHE_TTL = 300
+
+# Schemas kept across all users - least recently used are dropped first. Expired
+# entries stay until then, so their ETag can revalidate them with a 304
+SCHEMA_CACHE_SIZE = 500
+
+# (token digest, database id) -> (fetched at, properties, ETag); keyed per token so
+# credentials never see a schema fetched with someone else's
+_schema_cache: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Dict[str, Any]], Optional[str]]]" = OrderedDict()
+# Fetches in progress, so concurrent callers wait on one request
+_schema_inflight: Dict[Tuple[str, str], Future] = {}
+_schema_lock = threading.Lock()
+
 
 def fetch_databases(api_key: str, page_id: Optional[str] = None) -> List[Dict[str, Any]]:
     """Fetch all databases the integration has access to"""
     client = NotionClient(api_key)
     
-    results = client.search({"filter": {"property": "object", "value": "database"}})
+    results = client.iter_search({"filter": {"property": "object", "value": "database"}})
     
     databases = []
     for db in results:
@@ -46,18 +70,85 @@ def fetch_databases(api_key: str, page_id: Optional[str] = None) -> List[Dict[st
         
         databases.append(db_info)
     
-    print(f"Found {len(databases)} Notion databases")
+    logger.info("Found %d Notion databases", len(databases))
     return databases
 
 
+def _schema_key(api_key: str, database_id: str) -> Tuple[str, str]:
+    return hashlib.sha256(api_key.encode()).hexdigest(), database_id
+
+
 def fetch_database_properties(api_key: str, database_id: str) -> Dict[str, Dict[str, Any]]:
-    """Fetch detailed properties schema for a database"""
+    """Fetch detailed properties schema for a database (cached for SCHEMA_CACHE_TTL)"""
+    key = _schema_key(api_key, database_id)
+    
+    with _schema_lock:
+        entry = _schema_cache.get(key)
+        if entry:
+            _schema_cache.move_to_end(key)
+            if time.monotonic() - entry[0] < SCHEMA_CACHE_TTL:
+                return entry[1]
+        
+        future = _schema_inflight.get(key)
+        if future is None:
+            future = _schema_inflight[key] = Future()
+            owner = True
+        else:
+            owner = False
+    
+    if not owner:
+        return future.result()
+    
+    try:
+        # An expired entry can still be revalidated with a conditional GET
+        properties, etag = _load_database_properties(api_key, database_id, entry)
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _schema_lock:
+            _schema_inflight.pop(key, None)
+    
+    # Empty means the fetch failed - don't cache it
+    if properties:
+        with _schema_lock:
+            _schema_cache[key] = (time.monotonic(), properties, etag)
+            _schema_cache.move_to_end(key)
+            while len(_schema_cache) > SCHEMA_CACHE_SIZE:
+                _schema_cache.popitem(last=False)
+    future.set_result(properties)
+    return properties
+
+
+def invalidate_database_properties(api_key: str, database_id: str) -> None:
+    """Drop a cached schema (e.g. after Notion rejected properties built from it)"""
+    with _schema_lock:
+        _schema_cache.pop(_schema_key(api_key, database_id), None)
+
+
+def _load_database_properties(
+    api_key: str,
+    database_id: str,
+    cached: Optional[Tuple[float, Dict[str, Dict[str, Any]], Optional[str]]] = None
+) -> Tuple[Dict[str, Dict[str, Any]], Optional[str]]:
+    """
+    GET a database and flatten its properties schema, returning (properties, ETag).
+    With a cached entry, sends If-None-Match and reuses its properties on 304.
+    """
     client = NotionClient(api_key)
     
-    db = client.get_database(database_id)
-    if not db:
-        return {}
+    cached_etag = cached[2] if cached else None
+    db, etag = client.get_database_if_modified(database_id, cached_etag)
+    if db is None:
+        if cached_etag and etag == cached_etag:
+            return cached[1], etag
+        return {}, None
     
+    return _flatten_properties(db), etag
+
+
+def _flatten_properties(db: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Properties schema of a database object, with select/status/multi_select options pulled out"""
     properties = {}
     for prop_name, prop_data in db.get("properties", {}).items():
         prop_type = prop_data.get("type")
@@ -74,64 +165,123 @@ def fetch_database_properties(api_key: str, database_id: str) -> Dict[str, Dict[
             "name": prop_name,
             "type": prop_type,
             "options": options,
+            # Case-folded option -> option, so select/status matching is a dict lookup
+            "_options_folded": {opt.casefold(): opt for opt in options if opt},
             "config": prop_data
         }
     
     return properties
 
 
+LOG_INDICATORS = ("log", "logs", "activity", "history", "journal")
+
+# Whole words only, so titles like "Dialogues" or "Catalog" aren't taken for logs
+_LOG_TITLE_RE = re.compile(r"\b(?:" + "|".join(LOG_INDICATORS) + r")\b", re.IGNORECASE)
+
+
+def _is_log_database(db: Dict[str, Any]) -> bool:
+    """Check if a database title marks it as a log database"""
+    return _LOG_TITLE_RE.search(db.get("title", "")) is not None
+
+
 def detect_log_database(databases: List[Dict[str, Any]]) -> Optional[str]:
-    """Detect if a log database exists by name matching."""
-    log_indicators = ["log", "logs", "activity", "history", "journal"]
-    
-    for db in databases:
-        title = db.get("title", "").lower()
-        for indicator in log_indicators:
-            if indicator in title:
-                return db.get("id")
+    """
+    Detect if a log database exists by name matching.
+    Pure filtering over an already-fetched list - no API calls.
+    """
+    return next((db.get("id") for db in databases if _is_log_database(db)), None)
+
+
+LogBuilder = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+# Log builders kept across all users - least recently used are dropped first
+LOG_BUILDERS_SIZE = 256
+
+# Log database id -> (schema signature, builder); the signature catches schema changes
+_log_builders: "OrderedDict[str, Tuple[Tuple[Tuple[str, str], ...], LogBuilder]]" = OrderedDict()
+_log_builders_lock = threading.Lock()
+
+
+def _log_field_builder(prop_name: str, prop_type: str) -> Optional[Callable[[Dict[str, Any]], Dict[str, Any]]]:
+    """Value builder for one log database property, chosen by its name and type (None if unused)"""
+    name = prop_name.lower()
     
+    if prop_type == "title":
+        return lambda log_data: {"title": [{"text": {"content": log_data.get("action", "Capture")[:2000]}}]}
+    if "time" in name or "date" in name:
+        if prop_type == "date":
+            return lambda log_data: {"date": {"start": log_data.get("timestamp") or get_local_datetime_context()["datetime_iso"]}}
+    elif "result" in name or "status" in name:
+        if prop_type == "select":
+            return lambda log_data: {"select": {"name": log_data.get("result", "Success")}}
+        if prop_type == "rich_text":
+            return lambda log_data: {"rich_text": [{"text": {"content": log_data.get("result", "Success")}}]}
+    elif "detail" in name or "description" in name or "note" in name:
+        if prop_type == "rich_text":
+            return lambda log_data: {"rich_text": [{"text": {"content": log_data.get("details", "")[:2000]}}]}
+    elif "database" in name or "target" in name:
+        if prop_type == "rich_text":
+            return lambda log_data: {"rich_text": [{"text": {"content": log_data.get("database", "")}}]}
+        if prop_type == "select":
+            return lambda log_data: {"select": {"name": log_data.get("database", "Unknown")}}
     return None
 
 
+def _log_builder(log_database_id: str, properties: Dict[str, Dict[str, Any]]) -> LogBuilder:
+    """
+    Properties builder specialized to a log database's schema.
+    Name matching runs once per schema; each entry then only constructs values.
+    """
+    signature = tuple((prop_name, prop_info["type"]) for prop_name, prop_info in properties.items())
+    with _log_builders_lock:
+        cached = _log_builders.get(log_database_id)
+        if cached and cached[0] == signature:
+            _log_builders.move_to_end(log_database_id)
+            return cached[1]
+    
+    fields = [
+        (prop_name, field)
+        for prop_name, prop_type in signature
+        if (field := _log_field_builder(prop_name, prop_type)) is not None
+    ]
+    
+    def build(log_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {prop_name: field(log_data) for prop_name, field in fields}
+    
+    with _log_builders_lock:
+        _log_builders[log_database_id] = (signature, build)
+        _log_builders.move_to_end(log_database_id)
+        while len(_log_builders) > LOG_BUILDERS_SIZE:
+            _log_builders.popitem(last=False)
+    return build
+
+
 def write_log_entry(
     api_key: str,
     log_database_id: str,
-    log_data: Dict[str, Any]
+    log_data: Dict[str, Any],
+    properties: Optional[Dict[str, Dict[str, Any]]] = None
 ) -> Dict[str, Any]:
-    """Write a log entry to the log database"""
-    from datetime import datetime
-    from .properties import build_property_value
-    
+    """
+    Write a log entry to the log database.
+    Pass the log database's properties schema when already fetched to skip the GET.
+    """
+    return write_log_entries(api_key, log_database_id, [log_data], properties)[0]
+
+
+def write_log_entries(
+    api_key: str,
+    log_database_id: str,
+    entries: List[Dict[str, Any]],
+    properties: Optional[Dict[str, Dict[str, Any]]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Write several log entries to one log database, creating the pages concurrently.
+    Returns one create_page result per entry, in order.
+    """
     client = NotionClient(api_key)
-    properties = fetch_database_properties(api_key, log_database_id)
+    if properties is None:
+        properties = fetch_database_properties(api_key, log_database_id)
     
-    log_properties = {}
-    
-    for prop_name, prop_info in properties.items():
-        prop_type = prop_info["type"]
-        prop_name_lower = prop_name.lower()
-        
-        if prop_type == "title":
-            log_properties[prop_name] = {
-                "title": [{"text": {"content": log_data.get("action", "Capture")[:2000]}}]
-            }
-        elif "time" in prop_name_lower or "date" in prop_name_lower:
-            if prop_type == "date":
-                timestamp = log_data.get("timestamp") or datetime.now().astimezone().isoformat()
-                log_properties[prop_name] = {"date": {"start": timestamp}}
-        elif "result" in prop_name_lower or "status" in prop_name_lower:
-            if prop_type == "select":
-                log_properties[prop_name] = {"select": {"name": log_data.get("result", "Success")}}
-            elif prop_type == "rich_text":
-                log_properties[prop_name] = {"rich_text": [{"text": {"content": log_data.get("result", "Success")}}]}
-        elif "detail" in prop_name_lower or "description" in prop_name_lower or "note" in prop_name_lower:
-            if prop_type == "rich_text":
-                log_properties[prop_name] = {"rich_text": [{"text": {"content": log_data.get("details", "")[:2000]}}]}
-        elif "database" in prop_name_lower or "target" in prop_name_lower:
-            if prop_type == "rich_text":
-                log_properties[prop_name] = {"rich_text": [{"text": {"content": log_data.get("database", "")}}]}
-            elif prop_type == "select":
-                log_properties[prop_name] = {"select": {"name": log_data.get("database", "Unknown")}}
-    
-    return client.create_page(log_database_id, log_properties)
-
+    build = _log_builder(log_database_id, properties)
+    return client.create_pages(log_database_id, [build(log_data) for log_data in entries])
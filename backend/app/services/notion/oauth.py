@@ -3,18 +3,21 @@ Notion OAuth - Public Integration authentication
 Allows users to connect their own Notion workspace via OAuth flow.
 """
 import base64
+import logging
 import secrets
-import requests
 import urllib.parse
 from typing import Dict, Any, Optional
 
 from app.config import settings
+from app.core.http_client import get_http_client
 
 # Notion OAuth endpoints
 NOTION_AUTH_URL = "https://api.notion.com/v1/oauth/authorize"
 NOTION_TOKEN_URL = "https://api.notion.com/v1/oauth/token"
 NOTION_API_VERSION = "2022-06-28"
 
+logger = logging.getLogger(__name__)
+
 
 def get_auth_url() -> Optional[Dict[str, str]]:
     """Generate Notion OAuth authorization URL"""
@@ -65,7 +68,7 @@ def exchange_code_for_token(code: str) -> Optional[Dict[str, Any]]:
             "redirect_uri": settings.notion_redirect_uri
         }
         
-        response = requests.post(
+        response = get_http_client().post(
             NOTION_TOKEN_URL,
             headers=headers,
             json=body,
@@ -86,11 +89,11 @@ def exchange_code_for_token(code: str) -> Optional[Dict[str, Any]]:
                 "duplicated_template_id": data.get("duplicated_template_id")
             }
         else:
-            print(f"Notion token exchange error: {response.status_code} - {response.text}")
+            logger.error("Notion token exchange error: %s - %s", response.status_code, response.text)
             return None
             
     except Exception as e:
-        print(f"Notion token exchange exception: {e}")
+        logger.error("Notion token exchange exception: %s", e)
         return None
 
 
@@ -111,7 +114,7 @@ def get_oauth_status(access_token: Optional[str]) -> Dict[str, Any]:
             "Notion-Version": NOTION_API_VERSION
         }
         
-        response = requests.get(
+        response = get_http_client().get(
             "https://api.notion.com/v1/users/me",
             headers=headers,
             timeout=10
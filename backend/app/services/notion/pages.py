@@ -1,39 +1,38 @@
 """
 Notion Pages operations
 """
+import logging
 from typing import List, Dict, Any
 
 from .client import NotionClient
 
+logger = logging.getLogger(__name__)
+
+
+def _page_title(page: Dict[str, Any]) -> str:
+    """Plain title of a page - from its "title" property, or "Name" for database rows"""
+    properties = page.get("properties") or {}
+    title_prop = properties["title"] if "title" in properties else properties.get("Name")
+    if title_prop and (title_parts := title_prop.get("title")):
+        return title_parts[0].get("text", {}).get("content", "Untitled")
+    return "Untitled"
+
 
 def fetch_pages(api_key: str) -> List[Dict[str, Any]]:
     """Fetch all accessible pages from Notion"""
     client = NotionClient(api_key)
     
-    results = client.search({"filter": {"property": "object", "value": "page"}})
+    results = client.iter_search({"filter": {"property": "object", "value": "page"}})
     
-    pages = []
-    for page in results:
-        page_id = page["id"]
-        title = "Untitled"
-        properties = page.get("properties", {})
-        
-        if "title" in properties:
-            title_parts = properties["title"].get("title", [])
-            if title_parts:
-                title = title_parts[0].get("text", {}).get("content", "Untitled")
-        elif "Name" in properties:
-            title_parts = properties["Name"].get("title", [])
-            if title_parts:
-                title = title_parts[0].get("text", {}).get("content", "Untitled")
-        
-        pages.append({
-            "id": page_id,
-            "title": title,
+    pages = [
+        {
+            "id": page["id"],
+            "title": _page_title(page),
             "icon": page.get("icon"),
             "url": page.get("url")
-        })
+        }
+        for page in results
+    ]
     
-    print(f"Found {len(pages)} Notion pages")
+    logger.info("Found %d Notion pages", len(pages))
     return pages
-
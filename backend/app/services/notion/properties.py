@@ -1,7 +1,94 @@
 """
 Notion Property value builders
 """
-from typing import Dict, Any, Optional
+import logging
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _text(value: Any) -> List[Dict[str, Any]]:
+    return [{"text": {"content": str(value)[:2000]}}]
+
+
+def _match_option(value: Any, prop_info: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    """Return (stripped value, matching option name or None) - case-insensitive"""
+    str_value = str(value).strip()
+    folded = str_value.casefold()
+    
+    options_folded = prop_info.get("_options_folded")
+    if options_folded is not None:
+        return str_value, options_folded.get(folded)
+    
+    # Schema not from fetch_database_properties - scan
+    for opt in prop_info.get("options", []):
+        if opt.casefold() == folded:
+            return str_value, opt
+    return str_value, None
+
+
+def _build_number(value: Any, prop_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    try:
+        return {"number": float(value)}
+    except (ValueError, TypeError):
+        return None
+
+
+def _build_select(value: Any, prop_info: Dict[str, Any]) -> Dict[str, Any]:
+    str_value, opt = _match_option(value, prop_info)
+    # Unknown values are used as-is (Notion creates the option)
+    return {"select": {"name": opt if opt is not None else str_value[:100]}}
+
+
+def _build_multi_select(value: Any, prop_info: Dict[str, Any]) -> Dict[str, Any]:
+    if isinstance(value, list):
+        tags = [{"name": str(t)[:100]} for t in value[:10]]
+    else:
+        tags = [{"name": str(value)[:100]}]
+    return {"multi_select": tags}
+
+
+def _build_status(value: Any, prop_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    _, opt = _match_option(value, prop_info)
+    if opt is not None:
+        return {"status": {"name": opt}}
+    # Status options can't be created through the API - fall back to the first one
+    options = prop_info.get("options", [])
+    if options:
+        return {"status": {"name": options[0]}}
+    return None
+
+
+def _build_date(value: Any, prop_info: Dict[str, Any]) -> Dict[str, Any]:
+    date_str = str(value)
+    if 'T' not in date_str:
+        return {"date": {"start": date_str[:10]}}
+    # Keep timezone offset if present
+    if '+' in date_str or date_str.endswith('Z'):
+        return {"date": {"start": date_str}}
+    return {"date": {"start": date_str[:19]}}
+
+
+def _build_checkbox(value: Any, prop_info: Dict[str, Any]) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"checkbox": value}
+    return {"checkbox": str(value).lower() in ('true', 'yes', '1')}
+
+
+# Property type -> value builder
+_BUILDERS: Dict[str, Callable[[Any, Dict[str, Any]], Optional[Dict[str, Any]]]] = {
+    "title": lambda value, prop_info: {"title": _text(value)},
+    "rich_text": lambda value, prop_info: {"rich_text": _text(value)},
+    "number": _build_number,
+    "select": _build_select,
+    "multi_select": _build_multi_select,
+    "status": _build_status,
+    "date": _build_date,
+    "checkbox": _build_checkbox,
+    "url": lambda value, prop_info: {"url": str(value)},
+    "email": lambda value, prop_info: {"email": str(value)},
+    "phone_number": lambda value, prop_info: {"phone_number": str(value)},
+}
 
 
 def build_property_value(
@@ -13,73 +100,14 @@ def build_property_value(
     if value is None:
         return None
     
-    try:
-        if prop_type == "title":
-            return {"title": [{"text": {"content": str(value)[:2000]}}]}
-        
-        elif prop_type == "rich_text":
-            return {"rich_text": [{"text": {"content": str(value)[:2000]}}]}
-        
-        elif prop_type == "number":
-            try:
-                return {"number": float(value)}
-            except (ValueError, TypeError):
-                return None
-        
-        elif prop_type == "select":
-            options = prop_info.get("options", [])
-            str_value = str(value).strip()
-            for opt in options:
-                if opt.lower() == str_value.lower():
-                    return {"select": {"name": opt}}
-            return {"select": {"name": str_value[:100]}}
-        
-        elif prop_type == "multi_select":
-            if isinstance(value, list):
-                tags = [{"name": str(t)[:100]} for t in value[:10]]
-            else:
-                tags = [{"name": str(value)[:100]}]
-            return {"multi_select": tags}
-        
-        elif prop_type == "status":
-            options = prop_info.get("options", [])
-            str_value = str(value).strip()
-            for opt in options:
-                if opt.lower() == str_value.lower():
-                    return {"status": {"name": opt}}
-            if options:
-                return {"status": {"name": options[0]}}
-            return None
-        
-        elif prop_type == "date":
-            date_str = str(value)
-            if 'T' in date_str:
-                # Keep timezone offset if present
-                if '+' in date_str or date_str.endswith('Z'):
-                    return {"date": {"start": date_str}}
-                else:
-                    return {"date": {"start": date_str[:19]}}
-            else:
-                return {"date": {"start": date_str[:10]}}
-        
-        elif prop_type == "checkbox":
-            if isinstance(value, bool):
-                return {"checkbox": value}
-            return {"checkbox": str(value).lower() in ['true', 'yes', '1']}
-        
-        elif prop_type == "url":
-            return {"url": str(value)}
-        
-        elif prop_type == "email":
-            return {"email": str(value)}
-        
-        elif prop_type == "phone_number":
-            return {"phone_number": str(value)}
-        
+    builder = _BUILDERS.get(prop_type)
+    if builder is None:
         return None
-        
+    
+    try:
+        return builder(value, prop_info)
     except Exception as e:
-        print(f"Error building property {prop_type}: {e}")
+        logger.warning("Error building property %s: %s", prop_type, e)
         return None
 
 
@@ -88,8 +116,11 @@ def apply_enriched_properties(
     enriched_data: Dict[str, Any],
     properties_schema: Dict[str, Dict[str, Any]]
 ) -> Dict[str, Any]:
-    """Apply AI-enriched data to existing property mappings."""
-    result = existing_properties.copy()
+    """
+    Apply AI-enriched data to existing property mappings.
+    existing_properties is not modified; it is returned as-is when nothing was filled.
+    """
+    delta = {}
     filled_by_ai = []
     
     for prop_name, value in enriched_data.items():
@@ -101,7 +132,7 @@ def apply_enriched_properties(
         
         prop_value = build_property_value(prop_type, value, prop_info)
         if prop_value:
-            result[prop_name] = prop_value
+            delta[prop_name] = prop_value
             filled_by_ai.append({
                 "property": prop_name,
                 "value": str(value)[:100],
@@ -109,7 +140,7 @@ def apply_enriched_properties(
             })
     
     return {
-        "properties": result,
+        "properties": {**existing_properties, **delta} if delta else existing_properties,
         "filled_by_ai": filled_by_ai
     }
 